@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Controller
+
+AIMD (additive increase, multiplicative decrease) limit on the number of
+website requests in flight. After every window of completed requests the
+controller looks at the timeout/overload rate and the median latency:
+
+- healthy and the limit was actually used: limit + 1 (doubled until the
+  first back-off, like TCP slow start, so a run ramps up in a few windows)
+- overload rate above MAX_ERROR_RATE, or median latency above
+  LATENCY_TOLERANCE x the best median seen: limit x BACKOFF_FACTOR
+
+so a run climbs to what the box and the network sustain and backs off as
+soon as timeouts spike. Every change is printed with the numbers behind it.
+
+Sessions built by http_fetcher.create_session(concurrency=...) take a slot
+around each request (after the host rate limit, so politeness waits never
+count as latency). Cache hits and dead-host short-circuits never take one.
+
+Usage:
+    from adaptive_concurrency import AdaptiveConcurrency
+    from http_fetcher import create_session
+
+    concurrency = AdaptiveConcurrency(minimum=2, maximum=64)
+    session = create_session(pool_size=64, concurrency=concurrency)
+    # run up to concurrency.maximum threads; the controller gates them
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import requests
+
+from dead_hosts import classify_connection_error
+
+# Window evaluation thresholds
+MAX_ERROR_RATE = 0.1
+LATENCY_TOLERANCE = 2.0
+BACKOFF_FACTOR = 0.7
+MIN_WINDOW = 8
+
+# Statuses that mean the site (or our link) is overloaded
+OVERLOAD_STATUSES = {429, 502, 503, 504}
+
+
+class RequestSlot:
+    """Outcome of one request made under the controller"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.failed = False
+
+
+class AdaptiveConcurrency:
+    """Dynamic semaphore whose size follows an AIMD rule"""
+
+    def __init__(self, minimum: int = 2, maximum: int = 64, initial: Optional[int] = None):
+        """
+        Args:
+            minimum: Lowest limit the controller backs off to
+            maximum: Highest limit it may climb to (size the thread pool to this)
+            initial: Starting limit (default: minimum)
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial or self.minimum))
+        self.in_flight = 0
+        self.peak = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.baseline: Optional[float] = None  # best window median latency
+        self.slow_start = True
+        self._cond = threading.Condition()
+        self._latencies: List[float] = []
+        self._failures = 0
+        self._saturated = False
+
+    @contextmanager
+    def slot(self) -> Iterator[RequestSlot]:
+        """
+        Hold one of the `limit` request slots. Timeouts and connection
+        resets raised inside count as failures; so does `slot.failed = True`.
+        """
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._saturated = True
+                self._cond.wait()
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+        request = RequestSlot()
+        try:
+            yield request
+        except requests.Timeout:
+            request.failed = True
+            raise
+        except requests.ConnectionError as e:
+            # Resets count as overload; dead sites (DNS, refused, TLS) say nothing about load
+            request.failed = classify_connection_error(e) is None
+            raise
+        finally:
+            self._release(request)
+
+    def _release(self, request: RequestSlot):
+        latency = time.monotonic() - request.started
+        with self._cond:
+            self.in_flight -= 1
+            self._latencies.append(latency)
+            self._failures += request.failed
+            if len(self._latencies) >= max(MIN_WINDOW, self.limit):
+                self._evaluate()
+            self._cond.notify_all()
+
+    def _evaluate(self):
+        """Apply the AIMD rule to the finished window (lock held)"""
+        samples = len(self._latencies)
+        error_rate = self._failures / samples
+        median = statistics.median(self._latencies)
+        # The best median may drift up slowly, so a site mix that is simply
+        # slower than the first window does not pin the limit down forever
+        self.baseline = median if self.baseline is None else min(median, self.baseline * 1.05)
+
+        old = self.limit
+        if error_rate > MAX_ERROR_RATE:
+            reason = f"{error_rate:.0%} timeouts/sobrecarga"
+        elif median > self.baseline * LATENCY_TOLERANCE:
+            reason = f"latencia mediana {median:.2f}s > {LATENCY_TOLERANCE:g}x {self.baseline:.2f}s"
+        else:
+            reason = None
+
+        if reason is not None:
+            self.limit = max(self.minimum, int(self.limit * BACKOFF_FACTOR))
+            self.slow_start = False
+        elif self._saturated:
+            step = self.limit if self.slow_start else 1
+            self.limit = min(self.maximum, self.limit + step)
+            reason = f"sano ({error_rate:.0%} errores, mediana {median:.2f}s)"
+
+        if self.limit != old:
+            if self.limit > old:
+                self.increases += 1
+            else:
+                self.decreases += 1
+            self.peak = max(self.peak, self.limit)
+            print(f"      ⚙️  Concurrencia {old} → {self.limit}: {reason} en {samples} peticiones")
+
+        self._latencies = []
+        self._failures = 0
+        self._saturated = False
+
+    def summary(self) -> str:
+        return (f"límite final {self.limit} (pico {self.peak}, rango {self.minimum}-{self.maximum}), "
+                f"{self.increases} subidas, {self.decreases} bajadas")
+
+
+def is_overload_response(response: requests.Response) -> bool:
+    """True for responses that should count against the controller like a timeout"""
+    return response.status_code in OVERLOAD_STATUSES
+
+
+def add_concurrency_arguments(parser: argparse.ArgumentParser):
+    """Add --adaptive-concurrency, --min-concurrency and --max-concurrency to a script's CLI"""
+    parser.add_argument(
+        '--adaptive-concurrency',
+        action='store_true',
+        help='Let an AIMD controller pick how many website requests run at once'
+    )
+    parser.add_argument(
+        '--min-concurrency',
+        type=int,
+        default=2,
+        help='With --adaptive-concurrency: lowest concurrent requests (default: 2)'
+    )
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=64,
+        help='With --adaptive-concurrency: highest concurrent requests (default: 64)'
+    )
+
+
+def concurrency_from_args(args: argparse.Namespace) -> Optional[AdaptiveConcurrency]:
+    """AdaptiveConcurrency configured from add_concurrency_arguments flags (None if not enabled)"""
+    if not args.adaptive_concurrency:
+        return None
+    return AdaptiveConcurrency(minimum=args.min_concurrency, maximum=args.max_concurrency)
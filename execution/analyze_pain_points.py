@@ -10,15 +10,24 @@ Usage:
 """
 
 import argparse
+import hashlib
+import heapq
 import json
+import os
+import tempfile
 import csv
 import sys
 import re
 import time
-from datetime import datetime
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
 from urllib.parse import urlparse
+from xml.etree import ElementTree
 
 try:
     import requests
@@ -28,27 +37,237 @@ except ImportError:
     print("Please run: pip install requests beautifulsoup4 lxml")
     sys.exit(1)
 
+from fingerprint_store import FingerprintStore, fingerprint_html
+from signal_store import SignalStore
+from http_cache import HttpCache, add_http_cache_arguments, http_cache_from_args
+from http_fetcher import create_session, enable_dns_cache, split_timeout
+from host_rate_limiter import (HostRateLimiter, RateLimitWaitExceeded, add_rate_limit_arguments,
+                               rate_limiter_from_args, wait_limit)
+from dead_hosts import DeadHostCache, DeadHostError, add_dead_host_arguments, dead_host_cache_from_args
+from adaptive_concurrency import AdaptiveConcurrency, add_concurrency_arguments, concurrency_from_args
+from charset_sniffing import CharsetStats, sniff_encoding, sniff_response
+from fetch_timing import TimingStats, measure
+from render_pool import RenderPool, add_render_arguments, render_pool_from_args
+from web_archive import INDEX_NAME, ArchiveReplay, WarcArchive, add_archive_arguments, archive_from_args
+from probe_websites import canonical_url, is_unreachable
+from deduplicate_leads import normalize_site
+
+# Changes whenever the analysis rules in this file change, so stored results
+# from older rules are never reused
+RULES_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+class Deadline:
+    """Wall-clock budget shared by every fetch and parse step of one lead"""
+    
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Args:
+            seconds: Total budget in seconds (None or 0 disables the deadline)
+        """
+        self.expires_at = time.monotonic() + seconds if seconds else None
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the budget, or None if unlimited"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        """True once the budget is spent"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+    
+    def timeout(self, cap: float) -> float:
+        """Per-request timeout: the step's own cap, bounded by what is left"""
+        remaining = self.remaining()
+        return cap if remaining is None else min(cap, remaining)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a download runs past the lead's deadline"""
+
+
+class Detector:
+    """A named pain-point check and the page inputs it reads"""
+    
+    def __init__(self, name: str, category: str, inputs: tuple, description: str):
+        """
+        Args:
+            name: CLI name (--disable-detector)
+            category: 'design', 'automation' or 'owner'
+            inputs: Page inputs read: 'raw', 'text', 'dom', 'headers',
+                'final_url', 'load_time', 'network'
+            description: One-line summary for --list-detectors
+        """
+        self.name = name
+        self.category = category
+        self.inputs = inputs
+        self.description = description
+        self.method = f"_detect_{name}"
+
+
+# Registry of checks, in the order their labels appear in the output
+DETECTORS = [
+    Detector('viewport', 'design', ('dom',), 'Meta viewport (responsive)'),
+    Detector('slow_load', 'design', ('load_time',), 'Homepage load time > 3s'),
+    Detector('https', 'design', ('final_url',), 'Final URL served over HTTPS'),
+    Detector('outdated_design', 'design', ('text',), 'Flash/frames or copyright before 2020'),
+    Detector('meta_description', 'design', ('dom',), 'Meta description (SEO)'),
+    Detector('image_alt', 'design', ('dom',), 'Alt text on most images'),
+    Detector('chatbot', 'automation', ('text',), 'Chat widget vendors'),
+    Detector('basic_forms', 'automation', ('dom', 'text'), 'Forms without automation vendors'),
+    Detector('booking', 'automation', ('text',), 'Online booking/calendar'),
+    Detector('crm', 'automation', ('text',), 'Visible CRM integration'),
+    Detector('email_marketing', 'automation', ('text',), 'Newsletter/email marketing'),
+    Detector('social_widgets', 'automation', ('dom',), 'Embedded social media widgets'),
+    Detector('owner', 'owner', ('dom', 'network'), 'Owner name/email/title (structured data, subpages, regexes)'),
+]
+DETECTOR_NAMES = [d.name for d in DETECTORS]
+
+# Analysis fields written on each lead, by the detector categories they come
+# from. Callers that only read some of them (--fields) get the other
+# categories skipped: no owner fields means no subpage crawl.
+SCORE_FIELDS = ['pain_point', 'pain_point_details', 'proposed_solution', 'opportunity_score']
+OWNER_FIELDS = ['owner_name', 'owner_email', 'owner_title', 'owner_phone', 'owner_same_as', 'owner_source']
+FIELD_CATEGORIES = {**{field: ('design', 'automation') for field in SCORE_FIELDS},
+                    **{field: ('owner',) for field in OWNER_FIELDS}}
+
+
+def unneeded_detectors(fields: Iterable[str]) -> List[str]:
+    """Detectors whose results none of the requested analysis fields depend on"""
+    categories = {category for field in fields for category in FIELD_CATEGORIES[field]}
+    return [d.name for d in DETECTORS if d.category not in categories]
+
 
 class WebsiteAnalyzer:
     """Analyze websites for pain points and opportunities"""
     
-    def __init__(self, timeout: int = 10):
+    # schema.org types that describe the business itself / a person behind it
+    ORGANIZATION_TYPES = {'organization', 'localbusiness', 'legalservice', 'attorney',
+                          'professionalservice', 'medicalbusiness', 'dentist', 'corporation'}
+    PERSON_TYPES = {'person'}
+    
+    # Subpages worth visiting for owner info, checked in this order
+    PAGE_KEYWORDS = [
+        # Team/About pages (HIGH PRIORITY for decision makers)
+        ('team', ['equipo', 'team', 'nosotros', 'about', 'quienes', 'sobre-nosotros', 'nuestro-equipo']),
+        # Contact pages
+        ('contact', ['contacto', 'contact']),
+        # Legal notice pages (very important for Spanish sites!)
+        ('legal', ['aviso-legal', 'aviso legal', 'legal', 'privacidad', 'privacy']),
+    ]
+    
+    # Max child sitemaps followed from a sitemap index
+    MAX_CHILD_SITEMAPS = 3
+    
+    # Pre-trimming: markup with no visible text, dropped before parsing
+    SCRIPT_BLOCK = re.compile(r'(<script\b[^>]*>)(.*?)(</script\s*>)', re.S | re.I)
+    NON_TEXT_BLOCKS = re.compile(r'(<(style|noscript|svg)\b[^>]*>).*?(</\2\s*>)', re.S | re.I)
+    DATA_URI = re.compile(r'data:[\w.+-]+/[\w.+-]+;base64,[A-Za-z0-9+/=\s]+', re.I)
+    OVERSIZED_ATTRIBUTE = re.compile(r'(\s[\w:.-]+=)("[^"]{1024,}"|\'[^\']{1024,}\')')
+    # Inline scripts up to this size are kept: vendor embeds (Tawk, Intercom,
+    # Drift...) are small and the automation checks look for them
+    MAX_INLINE_SCRIPT = 2048
+    
+    # Signal density: a homepage is "thin" (worth a headless render) when it
+    # has almost no visible text and either looks like a JS app shell or has
+    # next to no links
+    TAG = re.compile(r'<[^>]+>')
+    SPA_MARKERS = re.compile(
+        r'<div id=["\'](?:root|app|__next|__nuxt)["\']\s*>\s*</div>|__NEXT_DATA__|ng-version=|data-reactroot', re.I
+    )
+    THIN_TEXT_CHARS = 300
+    THIN_SPA_TEXT_CHARS = 1500
+    THIN_LINKS = 3
+    RENDER_TIMEOUT = 15
+    
+    # Scoring thresholds. After changing them, rescore_leads.py re-applies
+    # them to the stored signals (signal_store.py) without a crawl
+    SLOW_LOAD_SECONDS = 3
+    VERY_SLOW_LOAD_SECONDS = 5
+    MAX_DESIGN_POINTS = 5
+    AUTOMATION_GAPS_PER_POINT = 2
+    MAX_AUTOMATION_POINTS = 3
+    
+    def __init__(self, timeout: int = 10, lead_budget: Optional[float] = 20,
+                 use_sitemap: bool = False, fingerprints: Optional[FingerprintStore] = None,
+                 cpu_pool: Optional[Executor] = None, max_text_bytes: int = 512 * 1024,
+                 disabled_detectors: Optional[List[str]] = None,
+                 fields: Optional[List[str]] = None,
+                 http_cache: Optional[HttpCache] = None, pool_size: int = 10,
+                 limiter: Optional[HostRateLimiter] = None,
+                 dead_hosts: Optional[DeadHostCache] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 render_pool: Optional[RenderPool] = None,
+                 archive: Optional[WarcArchive] = None,
+                 replay: Optional[ArchiveReplay] = None):
         """
         Initialize the analyzer.
         
         Args:
             timeout: Request timeout in seconds
+            lead_budget: Total seconds per lead across main page and subpages
+                (None or 0 disables the budget)
+            use_sitemap: Pick owner-info subpages from robots.txt/sitemap.xml
+            fingerprints: Store of previous results keyed by homepage content
+                hash; unchanged sites reuse them instead of being re-analyzed
+            cpu_pool: Process pool for parsing and regex work; None runs it
+                inline on the fetching thread
+            max_text_bytes: Cap on each page's HTML after trimming
+            disabled_detectors: Names from DETECTORS to skip
+            fields: Analysis fields the caller reads (see FIELD_CATEGORIES);
+                detectors and subpage fetches feeding only other fields are
+                skipped, and unscored results say 'N/A'. None computes all
+            http_cache: Response cache shared with the other pipeline stages;
+                None always downloads
+            pool_size: Keep-alive connections per host (match the fetch threads)
+            limiter: Per-host rate limiter shared with concurrent runs
+            dead_hosts: Negative cache of hosts that recently failed to
+                connect; those fail at once as 'Error de Acceso'
+            concurrency: Adaptive limit on requests in flight; None leaves
+                it to the number of fetch threads
+            render_pool: Headless browsers for homepages whose static HTML
+                is too thin (JS apps); None keeps the static analysis
+            archive: WARC archive every response and failure is written to
+            replay: Archive served instead of the network (and instead of
+                the render pool); nothing is fetched
         """
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.lead_budget = lead_budget
+        self.use_sitemap = use_sitemap
+        self.fingerprints = fingerprints
+        self.cpu_pool = cpu_pool
+        self.max_text_bytes = max_text_bytes
+        self.disabled_detectors = set(disabled_detectors or [])
+        if fields is not None:
+            self.disabled_detectors.update(unneeded_detectors(fields))
+        self.score_needed = fields is None or any(field in SCORE_FIELDS for field in fields)
+        self.http_cache = http_cache
+        # Cumulative CPU seconds per detector over the run
+        self.detector_costs: Dict[str, float] = {}
+        # Which charset_sniffing path decoded each page
+        self.charset_stats = CharsetStats()
+        # Phase timings of every page downloaded over the network
+        self.timing_stats = TimingStats()
+        self.archive = archive
+        self.replay = replay
+        self.render_pool = replay if replay is not None else render_pool
+        # Thin homepages seen, and how many of those a render changed
+        self.thin_pages = 0
+        self.render_changed = 0
+        self._costs_lock = threading.Lock()
+        self._sitemap_cache: Dict[str, List[tuple]] = {}
+        self.session = create_session(pool_size=pool_size, limiter=limiter, dead_hosts=dead_hosts,
+                                      concurrency=concurrency)
     
     def analyze_website(self, url: str, business_name: str) -> Dict:
         """
         Analyze a website for pain points and extract owner info.
         
+        Network I/O runs on the calling thread; parsing and the regex cascade
+        run in the parse process pool when one is attached (see _run_cpu).
+        
         Args:
             url: Website URL
             business_name: Name of the business
@@ -56,21 +275,13 @@ class WebsiteAnalyzer:
         Returns:
             Dictionary with analysis results
         """
-        result = {
-            'pain_point': 'Sin Web',
-            'pain_point_details': 'No se pudo acceder al sitio web',
-            'proposed_solution': 'Creación de sitio web profesional y optimizado para SEO.',
-            'opportunity_score': 0,
-            'owner_name': 'N/A',
-            'owner_email': 'N/A',
-            'owner_title': 'N/A',
-            'design_issues': [],
-            'automation_gaps': []
-        }
+        result = self._empty_result()
         
         if not url or url == 'N/A':
             return result
         
+        deadline = Deadline(self.lead_budget)
+        
         try:
             # Ensure URL has protocol
             if not url.startswith(('http://', 'https://')):
@@ -78,52 +289,89 @@ class WebsiteAnalyzer:
             
             print(f"    🔍 Analizando: {url}")
             
-            # Fetch website
-            start_time = time.time()
-            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
-            load_time = time.time() - start_time
+            # Fetch website. load_time is the site's share of the fetch
+            # (connect, TLS, server wait, transfer), not our queueing; cached
+            # and replayed pages keep the original figure
+            response = self._fetch(url, deadline, self.timeout)
+            load_time = response.elapsed.total_seconds()
+            fetch_timing = getattr(response, 'timing', None)
             
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            html_lower = response.text.lower()
-            
-            # Analyze design issues
-            design_issues = self._analyze_design(soup, html_lower, load_time, response)
-            
-            # Analyze automation gaps
-            automation_gaps = self._analyze_automation(soup, html_lower)
+            # Unchanged since the last run: reuse the stored analysis
+            content_hash = None
+            if self.fingerprints is not None:
+                content_hash = fingerprint_html(response.content)
+                cached = self.fingerprints.get(url, content_hash)
+                if cached is not None:
+                    return self._reuse_cached(cached, load_time, fetch_timing)
             
-            # Determine pain point
-            pain_point, details, solution = self._determine_pain_point(
-                design_issues, automation_gaps, load_time
-            )
+            # Parse HTML, design/automation checks, pain point and score
+            page = self._run_cpu('_analyze_homepage', response.content,
+                                 sniff_response(response, self.charset_stats),
+                                 dict(response.headers), response.url, url, load_time, deadline)
+            detector_cpu = page['detector_cpu']
             
-            # Calculate opportunity score
-            opportunity_score = self._calculate_opportunity_score(
-                design_issues, automation_gaps, load_time
-            )
+            # Thin static HTML (JS app shell): analyze the rendered DOM instead
+            rendered = False
+            if page['signal']['thin']:
+                with self._costs_lock:
+                    self.thin_pages += 1
+                if self.render_pool is not None and not deadline.expired():
+                    page, rendered = self._render_homepage(page, response, url, load_time, deadline)
             
             # Extract owner information
-            owner_info = self._extract_owner_info(soup, url, business_name)
+            owner_info = page['owner']
+            trimmed_bytes = page['trimmed_bytes']
+            if owner_info is None and not deadline.expired():
+                pages_to_check = page['owner_pages']
+                if self.use_sitemap:
+                    # Prefer team/legal/contact URLs listed in robots.txt/sitemap.xml
+                    pages_to_check = self._discover_pages_from_sitemap(url, deadline) or pages_to_check
+                fetched = self._fetch_owner_pages(pages_to_check, deadline)
+                owner_info, subpage_trimmed, owner_cpu = self._run_cpu(
+                    '_scan_owner_pages', page['main_text'], fetched, page['structured'], url, deadline
+                )
+                detector_cpu['owner'] = detector_cpu.get('owner', 0.0) + owner_cpu
+                trimmed_bytes += subpage_trimmed
+            owner_info = owner_info or self._empty_owner_info()
             
             result = {
-                'pain_point': pain_point,
-                'pain_point_details': details,
-                'proposed_solution': solution,
-                'opportunity_score': opportunity_score,
+                'pain_point': page['pain_point'],
+                'pain_point_details': page['details'],
+                'proposed_solution': page['solution'],
+                'opportunity_score': page['opportunity_score'],
                 'owner_name': owner_info['name'],
                 'owner_email': owner_info['email'],
                 'owner_title': owner_info['title'],
-                'design_issues': design_issues,
-                'automation_gaps': automation_gaps,
-                'load_time': round(load_time, 2)
+                'owner_phone': owner_info['phone'],
+                'owner_same_as': owner_info['same_as'],
+                'owner_source': owner_info['source'],
+                'design_issues': page['design_issues'],
+                'automation_gaps': page['automation_gaps'],
+                'load_time': round(load_time, 2),
+                'fetch_timing': fetch_timing,
+                'trimmed_bytes': trimmed_bytes,
+                'detector_cpu': detector_cpu,
+                'fetch_error': None,
+                'analysis_partial': deadline.expired(),
+                'analysis_cached': False,
+                'analysis_rendered': rendered
             }
+            if not self.score_needed:
+                # No design/automation detector ran: there is nothing to score
+                result.update(self._unscored())
             
-            print(f"      ✓ Punto de dolor: {pain_point} (Score: {opportunity_score}/10)")
+            self._record_costs(detector_cpu)
+            if content_hash and not result['analysis_partial']:
+                self.fingerprints.put(url, content_hash, result)
+            
+            if self.score_needed:
+                print(f"      ✓ Punto de dolor: {result['pain_point']} (Score: {result['opportunity_score']}/10)")
+            if result['analysis_partial']:
+                print(f"      ⏱️  Presupuesto agotado - resultados parciales")
             if owner_info['name'] != 'N/A':
-                print(f"      ✓ Propietario: {owner_info['name']} ({owner_info['title']})")
+                print(f"      ✓ Propietario: {owner_info['name']} ({owner_info['title']}) [{owner_info['source']}]")
             
             return result
             
@@ -133,14 +381,12 @@ class WebsiteAnalyzer:
             result['pain_point_details'] = 'Sitio extremadamente lento (timeout) o inaccesible. Pérdida masiva de conversiones.'
             result['proposed_solution'] = 'Optimización técnica de servidores (WPO) y migración a infraestructura de alta velocidad.'
             result['opportunity_score'] = 7
+            result['fetch_error'] = 'transient'
             return result
             
         except requests.RequestException as e:
             print(f"      ⚠️  Error de acceso: {str(e)[:50]}")
-            result['pain_point'] = 'Error de Acceso'
-            result['pain_point_details'] = f'Sitio inaccesible ({str(e)[:30]}). Posible dominio caducado o servidor caído.'
-            result['proposed_solution'] = 'Auditoría de infraestructura o recuperación de dominio.'
-            return result
+            return self._access_error(result, str(e), self._classify_fetch_error(e))
             
         except Exception as e:
             print(f"      ⚠️  Error inesperado: {str(e)[:50]}")
@@ -149,23 +395,398 @@ class WebsiteAnalyzer:
             result['proposed_solution'] = 'Revisión manual requerida.'
             return result
     
+    def unreachable_result(self, url: str, reason: str) -> Dict:
+        """
+        Result for a site the liveness probe (probe_websites.py) found
+        unreachable, without touching the network.
+        """
+        print(f"    🔍 Analizando: {url}")
+        print(f"      ⚠️  Inaccesible según el probe: {reason[:50]}")
+        return self._access_error(self._empty_result(), reason, 'permanent')
+    
+    @staticmethod
+    def _empty_result() -> Dict:
+        """Result for a lead without website; the other outcomes start from it"""
+        return {
+            'pain_point': 'Sin Web',
+            'pain_point_details': 'No se pudo acceder al sitio web',
+            'proposed_solution': 'Creación de sitio web profesional y optimizado para SEO.',
+            'opportunity_score': 0,
+            'owner_name': 'N/A',
+            'owner_email': 'N/A',
+            'owner_title': 'N/A',
+            'owner_phone': 'N/A',
+            'owner_same_as': [],
+            'owner_source': 'N/A',
+            'design_issues': [],
+            'automation_gaps': [],
+            'fetch_timing': None,
+            'trimmed_bytes': 0,
+            'detector_cpu': {},
+            'fetch_error': None,
+            'analysis_partial': False,
+            'analysis_cached': False,
+            'analysis_rendered': False
+        }
+    
+    @staticmethod
+    def _unscored() -> Dict:
+        """Score fields of a result whose caller did not ask for them"""
+        unscored = dict.fromkeys(SCORE_FIELDS, 'N/A')
+        unscored['opportunity_score'] = None
+        return unscored
+    
+    @staticmethod
+    def _access_error(result: Dict, message: str, fetch_error: str) -> Dict:
+        """Fill result as 'Error de Acceso' (site down, DNS/TLS failure...)"""
+        result['pain_point'] = 'Error de Acceso'
+        result['pain_point_details'] = f'Sitio inaccesible ({message[:30]}). Posible dominio caducado o servidor caído.'
+        result['proposed_solution'] = 'Auditoría de infraestructura o recuperación de dominio.'
+        result['fetch_error'] = fetch_error
+        return result
+    
+    @staticmethod
+    def _classify_fetch_error(error: requests.RequestException) -> str:
+        """
+        'transient' for failures worth retrying later (timeouts, 5xx, 429,
+        connection resets), 'permanent' for DNS, TLS and other 4xx errors.
+        """
+        if isinstance(error, DeadHostError):
+            return 'permanent'
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return 'transient' if status >= 500 or status == 429 else 'permanent'
+        if isinstance(error, requests.exceptions.SSLError):
+            return 'permanent'
+        if isinstance(error, requests.ConnectionError):
+            message = str(error).lower()
+            if any(x in message for x in ['name or service not known', 'nodename nor servname',
+                                          'getaddrinfo failed', 'name resolution', 'no address associated']):
+                return 'permanent'
+            return 'transient'
+        return 'permanent'
+    
+    def _run_cpu(self, method: str, *args):
+        """Run a CPU-bound step inline, or in the parse process pool when one is attached"""
+        if self.cpu_pool is None:
+            return getattr(self, method)(*args)
+        return self.cpu_pool.submit(_run_in_worker, method, *args).result()
+    
+    def _analyze_homepage(self, content: bytes, encoding: Optional[str], headers: Dict,
+                          final_url: str, url: str, load_time: float, deadline: Deadline) -> Dict:
+        """
+        CPU half of the homepage analysis: parse, detect issues, score, and
+        plan the owner search.
+        
+        Returns:
+            Dictionary with design_issues, automation_gaps, pain_point, details,
+            solution, opportunity_score, plus 'owner' (final owner info when
+            structured data already answered, else None), 'owner_pages',
+            'main_text' and 'structured' for the subpage pass, and
+            'detector_cpu' (CPU seconds per detector for this page) and
+            'signal' (see _signal_density)
+        """
+        costs: Dict[str, float] = {}
+        html, trimmed_bytes = self._trim_html(self._decode(content, encoding), len(content))
+        page = {
+            'raw': content,
+            'text': html.lower(),
+            'dom': None,
+            'headers': headers,
+            'final_url': final_url,
+            'load_time': load_time
+        }
+        
+        # Parse HTML only if an enabled detector reads the DOM
+        if self._needs_input('dom'):
+            started = time.thread_time()
+            page['dom'] = BeautifulSoup(html, 'html.parser')
+            costs['(html_parse)'] = time.thread_time() - started
+        
+        # Analyze design issues
+        design_issues = self._run_detectors('design', page, costs)
+        
+        # Analyze automation gaps (skipped once the budget is spent)
+        automation_gaps = []
+        if not deadline.expired():
+            automation_gaps = self._run_detectors('automation', page, costs)
+        
+        # Determine pain point
+        pain_point, details, solution = self._determine_pain_point(
+            design_issues, automation_gaps, load_time
+        )
+        
+        # Calculate opportunity score
+        opportunity_score = self._calculate_opportunity_score(
+            design_issues, automation_gaps, load_time
+        )
+        
+        result = {
+            'design_issues': design_issues,
+            'automation_gaps': automation_gaps,
+            'pain_point': pain_point,
+            'details': details,
+            'solution': solution,
+            'opportunity_score': opportunity_score,
+            'signal': self._signal_density(html),
+            'owner': None,
+            'owner_pages': [],
+            'main_text': '',
+            'structured': None,
+            'trimmed_bytes': trimmed_bytes,
+            'detector_cpu': costs
+        }
+        if 'owner' in self.disabled_detectors:
+            result['owner'] = self._empty_owner_info()
+            return result
+        if deadline.expired():
+            return result
+        
+        started = time.thread_time()
+        try:
+            result.update(self._plan_owner_search(page['dom'], url))
+        except Exception as e:
+            print(f"      ⚠️  Error extrayendo info del decisor: {str(e)[:50]}")
+            result['owner'] = self._empty_owner_info()
+        costs['owner'] = time.thread_time() - started
+        return result
+    
+    def _signal_density(self, html: str) -> Dict:
+        """
+        How much a static page has to analyze.
+        
+        Returns:
+            Dictionary with text_chars (visible text), links, spa_marker and
+            thin (True when only a rendered DOM would say anything)
+        """
+        text_chars = len(''.join(self.TAG.sub(' ', self.SCRIPT_BLOCK.sub(' ', html)).split()))
+        links = html.lower().count('<a ')
+        spa_marker = bool(self.SPA_MARKERS.search(html))
+        if '<frameset' in html.lower():
+            # The frames hold the content; a render of the frameset shows no more
+            thin = False
+        elif spa_marker:
+            thin = text_chars < self.THIN_SPA_TEXT_CHARS
+        else:
+            thin = text_chars < self.THIN_TEXT_CHARS and links < self.THIN_LINKS
+        return {'text_chars': text_chars, 'links': links, 'spa_marker': spa_marker, 'thin': thin}
+    
+    def _render_homepage(self, page: Dict, response: requests.Response, url: str,
+                         load_time: float, deadline: Deadline) -> tuple:
+        """
+        Re-run the homepage analysis on the headless-rendered DOM.
+        
+        Returns:
+            (page analysis to use, True if the rendered one is used)
+        """
+        print(f"      🧩 HTML estático casi vacío ({page['signal']['text_chars']} caracteres): renderizando")
+        html = self.render_pool.render(response.url, deadline.timeout(self.RENDER_TIMEOUT))
+        if not html:
+            return page, False
+        if self.archive is not None:
+            self.archive.record_render(response.url, html)
+        rendered = self._run_cpu('_analyze_homepage', html.encode('utf-8'), 'utf-8',
+                                 dict(response.headers), response.url, url, load_time, deadline)
+        for name, seconds in page['detector_cpu'].items():
+            rendered['detector_cpu'][name] = rendered['detector_cpu'].get(name, 0.0) + seconds
+        if (rendered['design_issues'], rendered['automation_gaps'], rendered['owner_pages']) != \
+                (page['design_issues'], page['automation_gaps'], page['owner_pages']):
+            with self._costs_lock:
+                self.render_changed += 1
+        return rendered, True
+    
+    def _record_costs(self, costs: Dict[str, float]):
+        """Add one lead's per-detector CPU seconds to the run totals"""
+        with self._costs_lock:
+            for name, seconds in costs.items():
+                self.detector_costs[name] = self.detector_costs.get(name, 0.0) + seconds
+    
+    def _trim_html(self, html: str, original_bytes: int) -> tuple:
+        """
+        Drop markup that carries no visible text before any parsing or regex work.
+        
+        Removes style/noscript/svg bodies, large inline script bodies (JSON-LD
+        is kept for the structured-data pass), base64 data URIs and oversized
+        attribute values, then caps the result at max_text_bytes.
+        
+        Returns:
+            (trimmed html, bytes removed)
+        """
+        def keep_small_scripts(match):
+            opening, body, closing = match.groups()
+            if 'ld+json' in opening.lower() or len(body) <= self.MAX_INLINE_SCRIPT:
+                return match.group(0)
+            return opening + closing
+        
+        html = self.SCRIPT_BLOCK.sub(keep_small_scripts, html)
+        html = self.NON_TEXT_BLOCKS.sub(r'\1\3', html)
+        html = self.DATA_URI.sub('data:', html)
+        html = self.OVERSIZED_ATTRIBUTE.sub(r'\1""', html)
+        if len(html) > self.max_text_bytes:
+            html = html[:self.max_text_bytes]
+        
+        removed = max(0, original_bytes - len(html.encode('utf-8', errors='replace')))
+        return html, removed
+    
+    @staticmethod
+    def _decode(content: bytes, encoding: Optional[str]) -> str:
+        """Bytes to text with the sniffed encoding (charset_sniffing) when none is given"""
+        if not encoding:
+            encoding, _ = sniff_encoding(content)
+        try:
+            return str(content, encoding, errors='replace')
+        except LookupError:
+            return str(content, 'utf-8', errors='replace')
+    
+    def _reuse_cached(self, cached: Dict, load_time: float, fetch_timing: Optional[Dict]) -> Dict:
+        """
+        Rebuild a result from a stored analysis of identical content.
+        
+        Only the load-time dependent parts are recomputed; nothing is parsed
+        and no subpage is fetched.
+        """
+        result = dict(cached)
+        if self.score_needed:
+            result.update(self.score_signals(cached['design_issues'], cached['automation_gaps'], load_time))
+        result.update({
+            'load_time': round(load_time, 2),
+            'fetch_timing': fetch_timing,
+            'detector_cpu': {},
+            'fetch_error': None,
+            'analysis_cached': True
+        })
+        print(f"      ♻️  Sin cambios desde el último análisis (Score: {result['opportunity_score']}/10)")
+        return result
+    
+    def _fetch(self, url: str, deadline: Deadline, cap: float) -> requests.Response:
+        """
+        GET a page without overrunning the lead's deadline.
+        
+        The body is streamed so a slow trickle is cut off when the budget
+        runs out, not just when a single socket read stalls. With a response
+        cache attached, fresh or revalidated (304) pages skip the download.
+        In replay mode the page comes from the archive; with an archive
+        attached, the page (or the failure) is written to it.
+        """
+        if deadline.expired():
+            raise DeadlineExceeded(f"Presupuesto agotado antes de pedir {url}")
+        if self.replay is not None:
+            return self.replay.get(url)
+        
+        try:
+            response = self._download(url, deadline, cap)
+        except DeadlineExceeded:
+            # Our budget, not the site's behaviour: nothing to archive
+            raise
+        except requests.RequestException as e:
+            if self.archive is not None:
+                self.archive.record_error(url, e)
+            raise
+        if self.archive is not None:
+            self.archive.record(url, response)
+        return response
+    
+    def _download(self, url: str, deadline: Deadline, cap: float) -> requests.Response:
+        """
+        Network half of _fetch. The result's `timing` holds the phase
+        timings in ms and its `elapsed` the site's share of them (see
+        fetch_timing.SERVER_PHASES), whole body included. The per-host
+        rate-limit wait counts against the deadline too: a slot that comes
+        after it raises DeadlineExceeded without waiting.
+        """
+        with measure() as timer:
+            try:
+                with wait_limit(deadline.remaining()):
+                    if self.http_cache is not None:
+                        response = self.http_cache.get(self.session, url,
+                                                       timeout=split_timeout(deadline.timeout(cap)),
+                                                       allow_redirects=True, stream=True)
+                    else:
+                        response = self.session.get(url, timeout=split_timeout(deadline.timeout(cap)),
+                                                    allow_redirects=True, stream=True)
+                        response.from_cache = False
+            except RateLimitWaitExceeded as e:
+                raise DeadlineExceeded(f"Presupuesto agotado esperando turno para {url} ({e})")
+            if response.from_cache:
+                return response
+            chunks = []
+            try:
+                with timer.phase('download'):
+                    for chunk in response.iter_content(chunk_size=65536):
+                        chunks.append(chunk)
+                        if deadline.expired():
+                            raise DeadlineExceeded(f"Presupuesto agotado descargando {url}")
+            finally:
+                response.close()
+        
+        response._content = b''.join(chunks)
+        response.elapsed = timedelta(seconds=timer.server_seconds())
+        response.timing = timer.ms()
+        self.timing_stats.add(timer)
+        if self.http_cache is not None:
+            self.http_cache.store(url, response)
+        return response
+    
     def _analyze_design(self, soup: BeautifulSoup, html_lower: str, 
-                       load_time: float, response) -> List[str]:
+                       load_time: float, final_url: str) -> List[str]:
         """Analyze design issues"""
-        issues = []
+        page = {'dom': soup, 'text': html_lower, 'load_time': load_time, 'final_url': final_url}
+        return self._run_detectors('design', page, {})
+    
+    def _analyze_automation(self, soup: BeautifulSoup, html_lower: str) -> List[str]:
+        """Analyze automation opportunities"""
+        page = {'dom': soup, 'text': html_lower}
+        return self._run_detectors('automation', page, {})
+    
+    def _run_detectors(self, category: str, page: Dict, costs: Dict[str, float]) -> List[str]:
+        """
+        Run the enabled detectors of one category, in registry order.
         
+        Args:
+            category: 'design' or 'automation'
+            page: Inputs by name ('raw', 'text', 'dom', 'headers', 'final_url', 'load_time')
+            costs: Accumulates CPU seconds per detector name
+            
+        Returns:
+            List of issue labels
+        """
+        issues = []
+        for detector in DETECTORS:
+            if detector.category != category or detector.name in self.disabled_detectors:
+                continue
+            started = time.thread_time()
+            issue = getattr(self, detector.method)(page)
+            costs[detector.name] = costs.get(detector.name, 0.0) + time.thread_time() - started
+            if issue:
+                issues.append(issue)
+        return issues
+    
+    def _needs_input(self, name: str) -> bool:
+        """True if any enabled detector (or the owner search) reads this page input"""
+        if name == 'dom' and 'owner' not in self.disabled_detectors:
+            return True
+        return any(name in d.inputs for d in DETECTORS if d.name not in self.disabled_detectors)
+    
+    # -- Design detectors ------------------------------------------------------
+    
+    def _detect_viewport(self, page: Dict) -> Optional[str]:
         # Check responsive design
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
+        viewport = page['dom'].find('meta', attrs={'name': 'viewport'})
         if not viewport:
-            issues.append("No responsive (sin viewport)")
-        
+            return "No responsive (sin viewport)"
+    
+    def _detect_slow_load(self, page: Dict) -> Optional[str]:
         # Check load time
-        if load_time > 3:
-            issues.append(f"Carga lenta ({load_time:.1f}s)")
-        
+        if page['load_time'] > self.SLOW_LOAD_SECONDS:
+            return f"Carga lenta ({page['load_time']:.1f}s)"
+    
+    def _detect_https(self, page: Dict) -> Optional[str]:
         # Check HTTPS
-        if not response.url.startswith('https://'):
-            issues.append("Sin HTTPS (inseguro)")
+        if not page['final_url'].startswith('https://'):
+            return "Sin HTTPS (inseguro)"
+    
+    def _detect_outdated_design(self, page: Dict) -> Optional[str]:
+        html_lower = page['text']
         
         # Check modern frameworks
         modern_indicators = ['react', 'vue', 'angular', 'next.js', 'nuxt']
@@ -176,79 +797,109 @@ class WebsiteAnalyzer:
         has_outdated = any(indicator in html_lower for indicator in outdated_indicators)
         
         if has_outdated:
-            issues.append("Tecnología obsoleta (Flash/Frames)")
+            return "Tecnología obsoleta (Flash/Frames)"
         elif not has_modern:
             # Check copyright year
             copyright_match = re.search(r'©\s*(\d{4})', html_lower)
             if copyright_match:
                 year = int(copyright_match.group(1))
                 if year < 2020:
-                    issues.append(f"Diseño anticuado (copyright {year})")
-        
+                    return f"Diseño anticuado (copyright {year})"
+    
+    def _detect_meta_description(self, page: Dict) -> Optional[str]:
         # Check meta tags (SEO)
-        if not soup.find('meta', attrs={'name': 'description'}):
-            issues.append("Sin meta description (mal SEO)")
-        
+        if not page['dom'].find('meta', attrs={'name': 'description'}):
+            return "Sin meta description (mal SEO)"
+    
+    def _detect_image_alt(self, page: Dict) -> Optional[str]:
         # Check images optimization
-        images = soup.find_all('img')
+        images = page['dom'].find_all('img')
         if images:
             images_without_alt = [img for img in images if not img.get('alt')]
             if len(images_without_alt) > len(images) * 0.5:
-                issues.append("Imágenes sin optimizar (sin alt text)")
-        
-        return issues
+                return "Imágenes sin optimizar (sin alt text)"
     
-    def _analyze_automation(self, soup: BeautifulSoup, html_lower: str) -> List[str]:
-        """Analyze automation opportunities"""
-        gaps = []
-        
+    # -- Automation detectors --------------------------------------------------
+    
+    def _detect_chatbot(self, page: Dict) -> Optional[str]:
         # Check for chatbot
         chatbot_indicators = ['intercom', 'drift', 'tawk', 'crisp', 'zendesk', 
                              'livechat', 'tidio', 'chat']
-        has_chatbot = any(indicator in html_lower for indicator in chatbot_indicators)
+        has_chatbot = any(indicator in page['text'] for indicator in chatbot_indicators)
         if not has_chatbot:
-            gaps.append("Sin chatbot")
-        
+            return "Sin chatbot"
+    
+    def _detect_basic_forms(self, page: Dict) -> Optional[str]:
         # Check forms
-        forms = soup.find_all('form')
+        forms = page['dom'].find_all('form')
         if forms:
             # Check for basic forms (no automation)
             advanced_form_indicators = ['hubspot', 'typeform', 'jotform', 
                                        'google forms', 'mailchimp']
-            has_advanced_forms = any(ind in html_lower for ind in advanced_form_indicators)
+            has_advanced_forms = any(ind in page['text'] for ind in advanced_form_indicators)
             if not has_advanced_forms:
-                gaps.append("Formularios básicos (sin automatización)")
-        
+                return "Formularios básicos (sin automatización)"
+    
+    def _detect_booking(self, page: Dict) -> Optional[str]:
         # Check for booking/calendar system
         calendar_indicators = ['calendly', 'cal.com', 'acuity', 'booking', 
                               'reserva', 'appointment']
-        has_calendar = any(indicator in html_lower for indicator in calendar_indicators)
+        has_calendar = any(indicator in page['text'] for indicator in calendar_indicators)
         if not has_calendar:
             # Only flag if it's a service business
-            gaps.append("Sin sistema de reservas online")
-        
+            return "Sin sistema de reservas online"
+    
+    def _detect_crm(self, page: Dict) -> Optional[str]:
         # Check for CRM integration
         crm_indicators = ['hubspot', 'salesforce', 'pipedrive', 'zoho']
-        has_crm = any(indicator in html_lower for indicator in crm_indicators)
+        has_crm = any(indicator in page['text'] for indicator in crm_indicators)
         if not has_crm:
-            gaps.append("Sin integración CRM visible")
-        
+            return "Sin integración CRM visible"
+    
+    def _detect_email_marketing(self, page: Dict) -> Optional[str]:
         # Check for email marketing
         email_marketing_indicators = ['mailchimp', 'sendinblue', 'convertkit', 
                                      'newsletter', 'suscr']
-        has_email_marketing = any(ind in html_lower for ind in email_marketing_indicators)
+        has_email_marketing = any(ind in page['text'] for ind in email_marketing_indicators)
         if not has_email_marketing:
-            gaps.append("Sin email marketing")
-        
+            return "Sin email marketing"
+    
+    def _detect_social_widgets(self, page: Dict) -> Optional[str]:
         # Check for social media integration
-        social_widgets = soup.find_all(['iframe', 'div'], 
-                                       class_=re.compile(r'(facebook|instagram|twitter)'))
+        social_widgets = page['dom'].find_all(['iframe', 'div'], 
+                                              class_=re.compile(r'(facebook|instagram|twitter)'))
         if not social_widgets:
-            gaps.append("Sin integración de redes sociales")
+            return "Sin integración de redes sociales"
+    
+    @classmethod
+    def score_signals(cls, design_issues: List[str], automation_gaps: List[str], load_time: float) -> Dict:
+        """
+        Pain point and opportunity score from a site's raw signals.
+        
+        The slow-load issue is re-derived from load_time, so stored signals
+        follow a changed SLOW_LOAD_SECONDS too.
+        
+        Returns:
+            Dictionary with pain_point, pain_point_details, proposed_solution,
+            opportunity_score and design_issues
+        """
+        design_issues = [i for i in design_issues if not i.startswith('Carga lenta')]
+        if load_time > cls.SLOW_LOAD_SECONDS:
+            # Same position _analyze_design gives it: right after the viewport check
+            position = 1 if design_issues and 'viewport' in design_issues[0] else 0
+            design_issues.insert(position, f"Carga lenta ({load_time:.1f}s)")
         
-        return gaps
+        pain_point, details, solution = cls._determine_pain_point(design_issues, automation_gaps, load_time)
+        return {
+            'pain_point': pain_point,
+            'pain_point_details': details,
+            'proposed_solution': solution,
+            'opportunity_score': cls._calculate_opportunity_score(design_issues, automation_gaps, load_time),
+            'design_issues': design_issues
+        }
     
-    def _determine_pain_point(self, design_issues: List[str], 
+    @staticmethod
+    def _determine_pain_point(design_issues: List[str], 
                              automation_gaps: List[str], load_time: float) -> tuple:
         """Determine primary pain point, details, and proposed solution"""
         
@@ -286,81 +937,159 @@ class WebsiteAnalyzer:
         
         return pain_point, details, solution
     
-    def _calculate_opportunity_score(self, design_issues: List[str], 
+    @classmethod
+    def _calculate_opportunity_score(cls, design_issues: List[str], 
                                     automation_gaps: List[str], load_time: float) -> int:
         """Calculate opportunity score (1-10)"""
         score = 0
         
         # Design issues (0-5 points)
-        score += min(len(design_issues), 5)
+        score += min(len(design_issues), cls.MAX_DESIGN_POINTS)
         
         # Automation gaps (0-3 points)
-        score += min(len(automation_gaps) // 2, 3)
+        score += min(len(automation_gaps) // cls.AUTOMATION_GAPS_PER_POINT, cls.MAX_AUTOMATION_POINTS)
         
         # Slow load time (0-2 points)
-        if load_time > 5:
+        if load_time > cls.VERY_SLOW_LOAD_SECONDS:
             score += 2
-        elif load_time > 3:
+        elif load_time > cls.SLOW_LOAD_SECONDS:
             score += 1
         
         return min(score, 10)
     
-    def _extract_owner_info(self, soup: BeautifulSoup, url: str, 
-                           business_name: str) -> Dict:
-        """Extract owner/decision maker information - Enhanced version"""
-        owner_info = {
+    @staticmethod
+    def _empty_owner_info() -> Dict:
+        return {
             'name': 'N/A',
             'email': 'N/A',
-            'title': 'N/A'
+            'title': 'N/A',
+            'phone': 'N/A',
+            'same_as': [],
+            'source': 'N/A'
         }
+    
+    def _extract_owner_info(self, soup: BeautifulSoup, url: str, 
+                           business_name: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Extract owner/decision maker information - Enhanced version"""
+        deadline = deadline or Deadline()
         
         try:
-            base_url = url.rsplit('/', 1)[0] if '/' in url else url
-            domain = urlparse(url).netloc.replace('www.', '')
-            
-            # 1. Search in main page first
-            main_text = soup.get_text()
-            main_html = str(soup)
+            plan = self._plan_owner_search(soup, url)
+            if plan['owner'] is not None:
+                return plan['owner']
             
-            # 2. Try to find and scrape special pages
-            pages_to_check = []
-            
-            # Find links to contact, about, legal pages
-            all_links = soup.find_all('a', href=True)
-            for link in all_links:
-                href = link.get('href', '').lower()
-                link_text = link.get_text().lower()
-                
-                # Team/About pages (HIGH PRIORITY for decision makers)
-                if any(x in href or x in link_text for x in ['equipo', 'team', 'nosotros', 'about', 'quienes', 'sobre-nosotros', 'nuestro-equipo']):
-                    full_url = href if href.startswith('http') else f"{base_url}/{href.lstrip('/')}"
-                    pages_to_check.append(('team', full_url))
-                
-                # Contact pages
-                elif any(x in href or x in link_text for x in ['contacto', 'contact']):
-                    full_url = href if href.startswith('http') else f"{base_url}/{href.lstrip('/')}"
-                    pages_to_check.append(('contact', full_url))
-                
-                # Legal notice pages (very important for Spanish sites!)
-                elif any(x in href or x in link_text for x in ['aviso-legal', 'aviso legal', 'legal', 'privacidad', 'privacy']):
-                    full_url = href if href.startswith('http') else f"{base_url}/{href.lstrip('/')}"
-                    pages_to_check.append(('legal', full_url))
-            
-            # Scrape additional pages (prioritize team pages, limit to 3)
-            additional_texts = []
-            # Sort to prioritize team pages first
-            pages_to_check.sort(key=lambda x: 0 if x[0] == 'team' else 1 if x[0] == 'legal' else 2)
-            for page_type, page_url in pages_to_check[:3]:
-                try:
-                    print(f"        📄 Revisando {page_type}: {page_url[:50]}...")
-                    page_response = self.session.get(page_url, timeout=5)
-                    page_soup = BeautifulSoup(page_response.text, 'html.parser')
-                    additional_texts.append((page_type, page_soup.get_text(), str(page_soup)))
-                except:
-                    pass
+            pages_to_check = plan['owner_pages']
+            if self.use_sitemap:
+                # Prefer team/legal/contact URLs listed in robots.txt/sitemap.xml
+                pages_to_check = self._discover_pages_from_sitemap(url, deadline) or pages_to_check
+            fetched = self._fetch_owner_pages(pages_to_check, deadline)
+            return self._scan_owner_pages(plan['main_text'], fetched, plan['structured'], url, deadline)[0]
+        except Exception as e:
+            print(f"      ⚠️  Error extrayendo info del decisor: {str(e)[:50]}")
+            return self._empty_owner_info()
+    
+    def _plan_owner_search(self, soup: BeautifulSoup, url: str) -> Dict:
+        """
+        Owner search on the already-parsed homepage (no network).
+        
+        Returns:
+            Dictionary with 'owner' (set when structured data gives a confident
+            answer), 'owner_pages' (candidate subpages from links), 'main_text'
+            and 'structured'
+        """
+        base_url = url.rsplit('/', 1)[0] if '/' in url else url
+        domain = urlparse(url).netloc.replace('www.', '')
+        plan = {'owner': None, 'owner_pages': [], 'main_text': '', 'structured': None}
+        
+        # 0. Structured data fast path (schema.org JSON-LD / microdata)
+        structured = self._extract_structured_data(soup)
+        plan['structured'] = structured
+        if structured['name'] != 'N/A':
+            # A named person is a confident answer: skip subpages and regexes
+            owner_info = self._empty_owner_info()
+            owner_info.update({
+                'name': structured['name'],
+                'title': structured['title'],
+                'email': structured['email'],
+                'phone': structured['phone'],
+                'same_as': structured['same_as'],
+                'source': 'structured_data'
+            })
+            if owner_info['email'] == 'N/A':
+                owner_info['email'] = self._estimate_email(owner_info['name'], domain)
+            plan['owner'] = owner_info
+            return plan
+        
+        # 1. Search in main page first
+        plan['main_text'] = soup.get_text()
+        
+        # 2. Find links to contact, about, legal pages
+        pages_to_check = []
+        all_links = soup.find_all('a', href=True)
+        for link in all_links:
+            href = link.get('href', '').lower()
+            page_type = self._classify_page(href, link.get_text().lower())
+            if page_type:
+                full_url = href if href.startswith('http') else f"{base_url}/{href.lstrip('/')}"
+                pages_to_check.append((page_type, full_url))
+        plan['owner_pages'] = pages_to_check
+        return plan
+    
+    def _fetch_owner_pages(self, pages_to_check: List[tuple], deadline: Deadline) -> List[tuple]:
+        """
+        Download the owner-info subpages (prioritize team pages, limit to 3).
+        
+        Returns:
+            List of (page_type, content bytes, encoding)
+        """
+        # Drop repeated URLs (menus and footers often link the same page twice)
+        seen_urls = set()
+        pages_to_check = [
+            (page_type, page_url) for page_type, page_url in pages_to_check
+            if not (page_url in seen_urls or seen_urls.add(page_url))
+        ]
+        
+        fetched = []
+        # Sort to prioritize team pages first
+        pages_to_check.sort(key=lambda x: 0 if x[0] == 'team' else 1 if x[0] == 'legal' else 2)
+        for page_type, page_url in pages_to_check[:3]:
+            if deadline.expired():
+                break
+            try:
+                print(f"        📄 Revisando {page_type}: {page_url[:50]}...")
+                page_response = self._fetch(page_url, deadline, 5)
+                fetched.append((page_type, page_response.content,
+                                sniff_response(page_response, self.charset_stats)))
+            except:
+                pass
+        return fetched
+    
+    def _scan_owner_pages(self, main_text: str, fetched: List[tuple], structured: Dict,
+                          url: str, deadline: Deadline) -> tuple:
+        """
+        CPU half of the owner search: parse subpages and run the regex cascade.
+        
+        Returns:
+            (owner info, bytes trimmed from the subpages, CPU seconds spent)
+        """
+        started = time.thread_time()
+        owner_info = self._empty_owner_info()
+        trimmed_bytes = 0
+        owner_info['phone'] = structured['phone']
+        owner_info['same_as'] = structured['same_as']
+        
+        try:
+            domain = urlparse(url).netloc.replace('www.', '')
             
             # Combine all texts for analysis
-            all_texts = [(main_text, main_html)] + [(t, h) for _, t, h in additional_texts]
+            all_texts = [main_text]
+            for page_type, content, encoding in fetched:
+                if deadline.expired():
+                    break
+                page_html, removed = self._trim_html(self._decode(content, encoding), len(content))
+                trimmed_bytes += removed
+                page_soup = BeautifulSoup(page_html, 'html.parser')
+                all_texts.append(page_soup.get_text())
             
             # 3. Extract decision maker name with enhanced patterns
             name_patterns = [
@@ -392,7 +1121,9 @@ class WebsiteAnalyzer:
                 r'([A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+)\s*<[a-z0-9._%+-]+@',
             ]
             
-            for text, html in all_texts:
+            for text in all_texts:
+                if deadline.expired():
+                    break
                 for pattern in name_patterns:
                     matches = re.findall(pattern, text)
                     if matches:
@@ -420,28 +1151,7 @@ class WebsiteAnalyzer:
                                     context = text[context_start:context_end]
                                     
                                     # Priority-based title extraction
-                                    if 'ceo' in context.lower():
-                                        owner_info['title'] = 'CEO'
-                                    elif any(x in context.lower() for x in ['fundador', 'fundadora']):
-                                        owner_info['title'] = 'Fundador'
-                                    elif any(x in context.lower() for x in ['socio', 'socia', 'partner']):
-                                        owner_info['title'] = 'Socio'
-                                    elif any(x in context.lower() for x in ['director general', 'directora general']):
-                                        owner_info['title'] = 'Director General'
-                                    elif any(x in context.lower() for x in ['director', 'directora']):
-                                        owner_info['title'] = 'Director'
-                                    elif any(x in context.lower() for x in ['gerente']):
-                                        owner_info['title'] = 'Gerente'
-                                    elif any(x in context.lower() for x in ['responsable']):
-                                        owner_info['title'] = 'Responsable'
-                                    elif any(x in context.lower() for x in ['coordinador', 'coordinadora']):
-                                        owner_info['title'] = 'Coordinador'
-                                    elif any(x in context.lower() for x in ['dr.', 'dra.', 'doctor', 'doctora', 'médico', 'médica']):
-                                        owner_info['title'] = 'Doctor'
-                                    elif any(x in context.lower() for x in ['abogado', 'abogada', 'letrado']):
-                                        owner_info['title'] = 'Abogado'
-                                    elif any(x in context.lower() for x in ['propietario', 'propietaria', 'titular']):
-                                        owner_info['title'] = 'Propietario'
+                                    owner_info['title'] = self._title_from_context(context)
                                     
                                     break
                     
@@ -465,7 +1175,9 @@ class WebsiteAnalyzer:
             ]
             
             found_emails = []
-            for text, html in all_texts:
+            for text in all_texts:
+                if deadline.expired() and found_emails:
+                    break
                 for pattern in email_patterns:
                     emails = re.findall(pattern, text.lower())
                     found_emails.extend(emails)
@@ -496,23 +1208,241 @@ class WebsiteAnalyzer:
                             owner_info['email'] = email
                             break
             
+            # Fall back to contact data published as structured data
+            if owner_info['email'] == 'N/A' and structured['email'] != 'N/A':
+                owner_info['email'] = structured['email']
+            
+            if owner_info['name'] != 'N/A' or owner_info['email'] != 'N/A':
+                owner_info['source'] = 'regex'
+            
             # 5. If we found a name but no email, try to construct one
             if owner_info['name'] != 'N/A' and owner_info['email'] == 'N/A':
-                name_parts = owner_info['name'].lower().split()
-                if len(name_parts) >= 2:
-                    # Try common patterns
-                    possible_emails = [
-                        f"{name_parts[0]}.{name_parts[-1]}@{domain}",
-                        f"{name_parts[0][0]}{name_parts[-1]}@{domain}",
-                        f"{name_parts[0]}@{domain}",
-                    ]
-                    # We can't verify these, so we'll mark as "estimated"
-                    owner_info['email'] = f"{possible_emails[0]} (estimado)"
+                owner_info['email'] = self._estimate_email(owner_info['name'], domain)
             
         except Exception as e:
             print(f"      ⚠️  Error extrayendo info del decisor: {str(e)[:50]}")
         
-        return owner_info
+        return owner_info, trimmed_bytes, time.thread_time() - started
+    
+    def _classify_page(self, href: str, link_text: str = '') -> Optional[str]:
+        """Return 'team', 'contact' or 'legal' for an owner-info subpage, else None"""
+        for page_type, keywords in self.PAGE_KEYWORDS:
+            if any(x in href or x in link_text for x in keywords):
+                return page_type
+        return None
+    
+    def _discover_pages_from_sitemap(self, url: str, deadline: Deadline) -> List[tuple]:
+        """
+        Pick team/contact/legal URLs from robots.txt and sitemap.xml.
+        
+        Read once per domain; later leads on the same domain reuse the result.
+        """
+        parsed = urlparse(url)
+        root = f"{parsed.scheme}://{parsed.netloc}"
+        domain = parsed.netloc.replace('www.', '')
+        if domain in self._sitemap_cache:
+            return list(self._sitemap_cache[domain])
+        
+        pages = []
+        try:
+            sitemap_urls = []
+            robots = self._fetch(f"{root}/robots.txt", deadline, 5)
+            if robots.ok:
+                for line in robots.text.splitlines():
+                    if line.lower().startswith('sitemap:'):
+                        sitemap_urls.append(line.split(':', 1)[1].strip())
+            if not sitemap_urls:
+                sitemap_urls = [f"{root}/sitemap.xml"]
+            
+            followed = 0
+            while sitemap_urls and followed <= self.MAX_CHILD_SITEMAPS and not deadline.expired():
+                response = self._fetch(sitemap_urls.pop(0), deadline, 5)
+                followed += 1
+                if not response.ok:
+                    continue
+                locs = self._parse_sitemap(response.content)
+                if locs['sitemaps']:
+                    # Sitemap index: page sitemaps first, skip blog/product feeds
+                    children = [u for u in locs['sitemaps']
+                                if not any(x in u.lower() for x in ['post', 'product', 'image', 'video'])]
+                    children.sort(key=lambda u: 0 if 'page' in u.lower() else 1)
+                    sitemap_urls = children + sitemap_urls
+                for loc in locs['pages']:
+                    page_type = self._classify_page(urlparse(loc).path.lower())
+                    if page_type:
+                        pages.append((page_type, loc))
+        except requests.RequestException:
+            pass
+        
+        # One URL per page type: the shallowest (/equipo over /equipo/juan-perez)
+        best = {}
+        for page_type, loc in pages:
+            if page_type not in best or len(loc) < len(best[page_type]):
+                best[page_type] = loc
+        pages = list(best.items())
+        
+        self._sitemap_cache[domain] = pages
+        return list(pages)
+    
+    @staticmethod
+    def _parse_sitemap(content: bytes) -> Dict[str, List[str]]:
+        """Split a sitemap (or sitemap index) into page and child-sitemap URLs"""
+        locs = {'pages': [], 'sitemaps': []}
+        try:
+            tree = ElementTree.fromstring(content)
+        except ElementTree.ParseError:
+            return locs
+        is_index = tree.tag.endswith('sitemapindex')
+        for element in tree.iter():
+            if element.tag.endswith('loc') and element.text:
+                locs['sitemaps' if is_index else 'pages'].append(element.text.strip())
+        return locs
+    
+    @staticmethod
+    def _title_from_context(context: str) -> str:
+        """Map the text around a name (or a jobTitle) to a normalized role"""
+        context = context.lower()
+        if 'ceo' in context:
+            return 'CEO'
+        elif any(x in context for x in ['fundador', 'fundadora', 'founder']):
+            return 'Fundador'
+        elif any(x in context for x in ['socio', 'socia', 'partner']):
+            return 'Socio'
+        elif any(x in context for x in ['director general', 'directora general']):
+            return 'Director General'
+        elif any(x in context for x in ['director', 'directora']):
+            return 'Director'
+        elif any(x in context for x in ['gerente']):
+            return 'Gerente'
+        elif any(x in context for x in ['responsable']):
+            return 'Responsable'
+        elif any(x in context for x in ['coordinador', 'coordinadora']):
+            return 'Coordinador'
+        elif any(x in context for x in ['dr.', 'dra.', 'doctor', 'doctora', 'médico', 'médica']):
+            return 'Doctor'
+        elif any(x in context for x in ['abogado', 'abogada', 'letrado']):
+            return 'Abogado'
+        elif any(x in context for x in ['propietario', 'propietaria', 'titular']):
+            return 'Propietario'
+        return 'N/A'
+    
+    @staticmethod
+    def _estimate_email(name: str, domain: str) -> str:
+        """Construct the most likely address for a name we could not find an email for"""
+        name_parts = name.lower().split()
+        if len(name_parts) < 2:
+            return 'N/A'
+        # Try common patterns
+        possible_emails = [
+            f"{name_parts[0]}.{name_parts[-1]}@{domain}",
+            f"{name_parts[0][0]}{name_parts[-1]}@{domain}",
+            f"{name_parts[0]}@{domain}",
+        ]
+        # We can't verify these, so we'll mark as "estimated"
+        return f"{possible_emails[0]} (estimado)"
+    
+    def _extract_structured_data(self, soup: BeautifulSoup) -> Dict:
+        """
+        Read schema.org JSON-LD and microdata published on the page.
+        
+        Returns:
+            Dictionary with name/title (of a Person or an Organization's
+            founder), email, phone and same_as links ('N/A' / [] when absent)
+        """
+        data = {'name': 'N/A', 'title': 'N/A', 'email': 'N/A', 'phone': 'N/A', 'same_as': []}
+        nodes = []
+        
+        # JSON-LD blocks (single object, list, or @graph)
+        for script in soup.find_all('script', attrs={'type': 'application/ld+json'}):
+            try:
+                payload = json.loads(script.string or script.get_text() or '')
+            except (ValueError, TypeError):
+                continue
+            stack = payload if isinstance(payload, list) else [payload]
+            while stack:
+                node = stack.pop(0)
+                if not isinstance(node, dict):
+                    continue
+                nodes.append(node)
+                graph = node.get('@graph')
+                if isinstance(graph, list):
+                    stack.extend(graph)
+        
+        # Microdata (itemscope/itemtype/itemprop)
+        for scope in soup.find_all(attrs={'itemscope': True, 'itemtype': True}):
+            if scope.find_parent(attrs={'itemscope': True}) is not None:
+                continue  # nested scopes are read through their parent
+            nodes.append(self._microdata_to_dict(scope))
+        
+        for node in nodes:
+            types = node.get('@type', [])
+            types = {t.lower() for t in (types if isinstance(types, list) else [types]) if isinstance(t, str)}
+            
+            people = []
+            if types & self.PERSON_TYPES:
+                people.append((node, node.get('jobTitle', '')))
+            if types & self.ORGANIZATION_TYPES or types & self.PERSON_TYPES:
+                founders = node.get('founder', [])
+                for founder in (founders if isinstance(founders, list) else [founders]):
+                    if isinstance(founder, dict):
+                        people.append((founder, founder.get('jobTitle') or 'Fundador'))
+                    elif isinstance(founder, str):
+                        people.append(({'name': founder}, 'Fundador'))
+            else:
+                continue
+            
+            for person, job_title in people:
+                name = person.get('name')
+                if data['name'] == 'N/A' and isinstance(name, str) and len(name.split()) >= 2:
+                    data['name'] = name.strip()
+                    data['title'] = self._title_from_context(str(job_title)) if job_title else 'N/A'
+                if data['email'] == 'N/A' and isinstance(person.get('email'), str):
+                    data['email'] = person['email'].replace('mailto:', '').strip().lower()
+            
+            if data['email'] == 'N/A' and isinstance(node.get('email'), str):
+                data['email'] = node['email'].replace('mailto:', '').strip().lower()
+            if data['phone'] == 'N/A' and isinstance(node.get('telephone'), str):
+                data['phone'] = node['telephone'].strip()
+            same_as = node.get('sameAs', [])
+            for link in (same_as if isinstance(same_as, list) else [same_as]):
+                if isinstance(link, str) and link not in data['same_as']:
+                    data['same_as'].append(link)
+        
+        return data
+    
+    def _microdata_to_dict(self, scope) -> Dict:
+        """Flatten one microdata itemscope into a JSON-LD-like dict"""
+        node = {'@type': [t.rstrip('/').rsplit('/', 1)[-1] for t in scope.get('itemtype', '').split()]}
+        for prop in scope.find_all(attrs={'itemprop': True}):
+            owner = prop.find_parent(attrs={'itemscope': True})
+            if owner is not scope:
+                continue  # belongs to a nested scope
+            if prop.has_attr('itemscope'):
+                value = self._microdata_to_dict(prop)
+            else:
+                value = (prop.get('content') or prop.get('href') or prop.get_text()).strip()
+            for key in prop['itemprop'].split():
+                if key in node:
+                    existing = node[key] if isinstance(node[key], list) else [node[key]]
+                    node[key] = existing + [value]
+                else:
+                    node[key] = value
+        return node
+
+
+# Per-process analyzer used by the parse pool (set by _init_worker)
+_WORKER_ANALYZER = None
+
+
+def _init_worker(settings: Dict):
+    """Parse pool initializer: build the analyzer with the parent's CPU-side settings"""
+    global _WORKER_ANALYZER
+    _WORKER_ANALYZER = WebsiteAnalyzer(lead_budget=None, **settings)
+
+
+def _run_in_worker(method: str, *args):
+    """Entry point for parse pool processes: run one CPU-bound analyzer step"""
+    return getattr(_WORKER_ANALYZER, method)(*args)
 
 
 def parse_leads_file(file_path: Path) -> List[Dict]:
@@ -551,6 +1481,221 @@ def parse_leads_file(file_path: Path) -> List[Dict]:
         return []
 
 
+def iter_leads(file_path: Path) -> Iterator[Dict]:
+    """
+    Yield leads one by one. JSONL and CSV are read lazily; JSON documents
+    have to be loaded whole and fall back to parse_leads_file.
+    """
+    ext = file_path.suffix.lower()
+    
+    if ext == '.jsonl':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    print(f"⚠️  Línea {line_number} ignorada (JSON inválido): {e}")
+    elif ext == '.csv':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    else:
+        yield from parse_leads_file(file_path)
+
+
+def ordered_map(pool: Executor, fn, items: Iterable, window: int) -> Iterator:
+    """
+    Like Executor.map, but with at most `window` items in flight, so a lazy
+    input is never read far ahead. Results come back in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class JsonlWriter:
+    """Append-only JSONL output, flushed after every lead so a crash loses nothing"""
+    
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.file = open(output_path, 'a', encoding='utf-8')
+    
+    def write(self, lead: Dict):
+        self.file.write(json.dumps(lead, ensure_ascii=False) + '\n')
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
+
+def external_sort_jsonl(path: Path, key: str = 'opportunity_score', chunk_size: int = 10000):
+    """
+    Sort a JSONL file by `key` (descending) with bounded memory: sorted runs
+    of chunk_size lines are spilled to temp files and then k-way merged.
+    """
+    def sort_key(line: str):
+        return -(json.loads(line).get(key) or 0)
+    
+    runs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = [line for _, line in zip(range(chunk_size), f)]
+            if not chunk:
+                break
+            chunk.sort(key=sort_key)
+            run = tempfile.TemporaryFile('w+', encoding='utf-8')
+            run.writelines(line if line.endswith('\n') else line + '\n' for line in chunk)
+            run.seek(0)
+            runs.append(run)
+    
+    sorted_path = path.with_suffix(path.suffix + '.sorting')
+    with open(sorted_path, 'w', encoding='utf-8') as out:
+        out.writelines(heapq.merge(*runs, key=sort_key))
+    for run in runs:
+        run.close()
+    os.replace(sorted_path, path)
+
+
+class AnalysisSummary:
+    """Run statistics gathered lead by lead, without keeping the leads"""
+    
+    def __init__(self, top_n: int = 5):
+        self.total = 0
+        self.pain_point_counts: Dict[str, int] = {}
+        self.fetch_counts: Dict[str, int] = {}
+        self.top_n = top_n
+        self._top: List[tuple] = []  # min-heap of (score, -seq, lead excerpt)
+    
+    def add(self, lead: Dict):
+        self.total += 1
+        pp = lead.get('pain_point', 'Unknown')
+        self.pain_point_counts[pp] = self.pain_point_counts.get(pp, 0) + 1
+        status = lead.get('fetch_status', 'ok')
+        self.fetch_counts[status] = self.fetch_counts.get(status, 0) + 1
+        
+        excerpt = {k: lead.get(k) for k in ['name', 'opportunity_score', 'pain_point', 'owner_name', 'owner_email']}
+        entry = (lead.get('opportunity_score') or 0, -self.total, excerpt)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, entry)
+        else:
+            heapq.heappushpop(self._top, entry)
+    
+    def top(self) -> List[Dict]:
+        """Best leads by opportunity score (first seen wins ties)"""
+        return [excerpt for _, _, excerpt in sorted(self._top, key=lambda e: (e[0], e[1]), reverse=True)]
+
+
+class DomainFanOut:
+    """
+    Analyze each site (normalized domain plus path, see normalize_site) once
+    and hand the result to every lead sharing it (franchises, firm groups).
+    Leads of the same site arriving while it is being analyzed wait for that
+    analysis. Only the most recent max_sites results are kept, so memory
+    stays flat however many leads stream through.
+    """
+    
+    def __init__(self, max_sites: int = 5000):
+        self.lock = threading.Lock()
+        self.max_sites = max_sites
+        self._results: 'OrderedDict[str, Future]' = OrderedDict()
+        self.analyzed = 0
+        self.reused = 0
+        self.seconds = 0.0
+    
+    def run(self, site: str, analyze: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """
+        Returns:
+            (analysis, True if it was reused from another lead)
+        """
+        if not site:
+            return analyze(), False
+        with self.lock:
+            future = self._results.get(site)
+            owner = future is None
+            if owner:
+                future = self._results[site] = Future()
+                self._evict()
+            else:
+                self._results.move_to_end(site)
+                self.reused += 1
+        if not owner:
+            return future.result(), True
+        
+        started = time.time()
+        try:
+            analysis = analyze()
+        except BaseException as e:
+            # Waiting leads get the error; later ones analyze the site again
+            with self.lock:
+                if self._results.get(site) is future:
+                    del self._results[site]
+            future.set_exception(e)
+            raise
+        future.set_result(analysis)
+        with self.lock:
+            self.analyzed += 1
+            self.seconds += time.time() - started
+        return analysis, False
+    
+    def _evict(self):
+        """Drop the least recently used finished results beyond max_sites"""
+        excess = len(self._results) - self.max_sites
+        if excess <= 0:
+            return
+        # Oldest first, skipping sites still being analyzed
+        stale = []
+        for site, future in self._results.items():
+            if future.done():
+                stale.append(site)
+                if len(stale) == excess:
+                    break
+        for site in stale:
+            del self._results[site]
+    
+    def clear(self):
+        """Forget results (before a retry round) but keep the counters"""
+        with self.lock:
+            self._results.clear()
+    
+    def summary(self) -> str:
+        avoided = self.seconds / self.analyzed * self.reused if self.analyzed else 0
+        return (f"{self.reused} leads reutilizaron el análisis de otro con la misma web "
+                f"({self.analyzed} webs analizadas, ~{avoided:.0f}s evitados)")
+
+
+# fetch_status written on each lead, by WebsiteAnalyzer fetch_error. The retry
+# lane later turns 'transient_failure' into 'recovered' or 'confirmed_failure'.
+FETCH_STATUS = {'transient': 'transient_failure', 'permanent': 'failure'}
+
+
+def merge_analysis(lead: Dict, analysis: Dict) -> Dict:
+    """Merge analysis with lead data"""
+    lead.update({
+        'pain_point': analysis['pain_point'],
+        'pain_point_details': analysis['pain_point_details'],
+        'proposed_solution': analysis['proposed_solution'],
+        'opportunity_score': analysis['opportunity_score'],
+        'owner_name': analysis['owner_name'],
+        'owner_email': analysis['owner_email'],
+        'owner_title': analysis['owner_title'],
+        'owner_source': analysis['owner_source'],
+        'owner_phone': analysis['owner_phone'],
+        'owner_same_as': ', '.join(analysis['owner_same_as']) or 'N/A',
+        'analysis_partial': analysis['analysis_partial'],
+        'analysis_cached': analysis['analysis_cached'],
+        'analysis_rendered': analysis.get('analysis_rendered', False),
+        'fetch_timing_ms': ' '.join(f"{phase}={ms}" for phase, ms in (analysis.get('fetch_timing') or {}).items()) or 'N/A',
+        'fetch_status': FETCH_STATUS.get(analysis['fetch_error'], 'ok')
+    })
+    return lead
+
+
 def save_results(leads: List[Dict], output_path: Path, format: str):
     """Save analyzed results"""
     
@@ -587,41 +1732,195 @@ def main():
 Examples:
   python analyze_pain_points.py --input .tmp/gmb_leads_enhanced_*.json
   python analyze_pain_points.py --input .tmp/leads.csv --output-format csv
+  python analyze_pain_points.py --input .tmp/leads.json --io-workers 16 --parse-processes 8
+  python analyze_pain_points.py --input .tmp/leads.jsonl --output-format jsonl --sort
+  python analyze_pain_points.py --input .tmp/leads.json --adaptive-concurrency --max-concurrency 48
+  python analyze_pain_points.py --input .tmp/leads.json --archive .tmp/archive/enero
+  python analyze_pain_points.py --input .tmp/leads.json --from-archive .tmp/archive/enero
         """
     )
     
     parser.add_argument(
         '--input', '-i',
         type=str,
-        required=True,
-        help='Path to leads file (JSON or CSV)'
+        help='Path to leads file (JSON, JSONL or CSV; JSONL and CSV are streamed)'
     )
     
     parser.add_argument(
         '--output-format', '-f',
         type=str,
-        choices=['json', 'csv'],
+        choices=['json', 'csv', 'jsonl'],
         default='csv',
-        help='Output format (default: csv)'
+        help='Output format (default: csv). jsonl appends each lead as soon as it is done'
+    )
+    
+    parser.add_argument(
+        '--sort',
+        action='store_true',
+        help='With jsonl output: sort the file by opportunity_score at the end (external merge sort)'
+    )
+    
+    parser.add_argument(
+        '--lead-budget',
+        type=float,
+        default=20,
+        help='Total seconds per lead across main page and subpages, 0 = unlimited (default: 20)'
+    )
+    
+    parser.add_argument(
+        '--use-sitemap',
+        action='store_true',
+        help='Pick team/legal/contact pages from robots.txt and sitemap.xml (cached per domain)'
+    )
+    
+    parser.add_argument(
+        '--cache-path',
+        type=str,
+        default=None,
+        help='Content fingerprint store (default: .tmp/analysis_cache.sqlite)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Re-analyze every site even if its content is unchanged'
+    )
+    
+    parser.add_argument(
+        '--signals-path',
+        type=str,
+        default=None,
+        help='Store of raw scoring signals read by rescore_leads.py (default: .tmp/signals.sqlite)'
+    )
+    
+    parser.add_argument(
+        '--no-signals',
+        action='store_true',
+        help='Do not store scoring signals'
+    )
+    
+    add_http_cache_arguments(parser)
+    add_rate_limit_arguments(parser)
+    add_dead_host_arguments(parser)
+    
+    parser.add_argument(
+        '--io-workers',
+        type=int,
+        default=1,
+        help='Threads fetching websites concurrently; results keep input order (default: 1)'
+    )
+    
+    add_concurrency_arguments(parser)
+    add_render_arguments(parser)
+    add_archive_arguments(parser)
+    
+    parser.add_argument(
+        '--from-archive',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Re-analyze from a --archive directory instead of the network (no requests are made)'
+    )
+    
+    parser.add_argument(
+        '--parse-processes',
+        type=int,
+        default=0,
+        help='Processes for HTML parsing and regex work, 0 = parse on the fetch threads (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--max-text-kb',
+        type=int,
+        default=512,
+        help='Cap on each page\'s HTML after dropping scripts/styles/data URIs (default: 512)'
+    )
+    
+    parser.add_argument(
+        '--disable-detector',
+        action='append',
+        choices=DETECTOR_NAMES,
+        default=[],
+        metavar='NAME',
+        help='Skip a detector (repeatable); see --list-detectors'
+    )
+    
+    parser.add_argument(
+        '--fields',
+        type=str,
+        default=None,
+        help=f'Comma-separated analysis fields the next step reads; the rest are not computed '
+             f'(choices: {", ".join(FIELD_CATEGORIES)}; default: all)'
+    )
+    
+    parser.add_argument(
+        '--list-detectors',
+        action='store_true',
+        help='List available detectors and the inputs they read, then exit'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=2,
+        help='Retry rounds for timeouts, 5xx and connection resets after the main pass (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--retry-backoff',
+        type=float,
+        default=5,
+        help='Seconds before the first retry round, doubled each round (default: 5)'
     )
     
     args = parser.parse_args()
     
+    if args.list_detectors:
+        for detector in DETECTORS:
+            print(f"  {detector.name:<18} {detector.category:<11} {', '.join(detector.inputs):<18} {detector.description}")
+        return 0
+    
+    fields = None
+    if args.fields:
+        fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in FIELD_CATEGORIES]
+        if unknown:
+            parser.error(f"unknown --fields: {', '.join(unknown)}")
+    
     # Load leads
+    if not args.input:
+        parser.error('--input is required')
     input_path = Path(args.input)
     
     if not input_path.exists():
         print(f"❌ Error: Archivo no encontrado: {input_path}")
         sys.exit(1)
     
-    print(f"\n📄 Cargando leads desde: {input_path.name}")
-    leads = parse_leads_file(input_path)
+    replay = None
+    if args.from_archive:
+        archive_dir = Path(args.from_archive)
+        if not (archive_dir / INDEX_NAME).exists():
+            print(f"❌ Error: Archivo WARC no encontrado: {archive_dir}")
+            sys.exit(1)
+        replay = ArchiveReplay(archive_dir)
     
-    if not leads:
-        print("❌ Error: No se encontraron leads en el archivo")
-        sys.exit(1)
+    streaming = args.output_format == 'jsonl'
     
-    print(f"✓ Cargados {len(leads)} leads\n")
+    print(f"\n📄 Cargando leads desde: {input_path.name}")
+    if streaming:
+        # Leads are read lazily and written as soon as each one is done
+        leads = iter_leads(input_path)
+        total = None
+        print("✓ Lectura en streaming\n")
+    else:
+        leads = list(iter_leads(input_path))
+        total = len(leads)
+        
+        if not leads:
+            print("❌ Error: No se encontraron leads en el archivo")
+            sys.exit(1)
+        
+        print(f"✓ Cargados {len(leads)} leads\n")
     
     # Setup output
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -636,47 +1935,163 @@ Examples:
     print("=" * 80)
     print("ANÁLISIS DE PUNTOS DE DOLOR")
     print("=" * 80)
-    print(f"Total Leads: {len(leads)}")
+    print(f"Total Leads: {total if total is not None else 'streaming'}")
     print(f"Formato Salida: {args.output_format}")
+    if args.disable_detector:
+        print(f"Detectores Desactivados: {', '.join(args.disable_detector)}")
+    if fields is not None:
+        print(f"Campos Pedidos: {', '.join(fields)} (omitidos: {', '.join(unneeded_detectors(fields)) or 'ninguno'})")
+    print(f"Presupuesto por Lead: {f'{args.lead_budget:g}s' if args.lead_budget else 'sin límite'}")
+    if replay is not None:
+        print(f"Modo Replay: {args.from_archive} ({len(replay)} URLs archivadas, sin red)")
     print(f"Archivo Salida: {output_path}")
     print("=" * 80 + "\n")
     
     # Initialize analyzer
-    analyzer = WebsiteAnalyzer()
-    
-    # Analyze each lead
-    analyzed_leads = []
+    fingerprints = None
+    # A replay exists to re-run the rules: never short-circuit it with the fingerprint store
+    if not args.no_cache and replay is None:
+        cache_path = Path(args.cache_path) if args.cache_path else tmp_dir / "analysis_cache.sqlite"
+        # Sitemap discovery and disabled detectors change results, so they are part of the rules
+        disabled = set(args.disable_detector) | set(unneeded_detectors(fields) if fields is not None else [])
+        rules = f"{RULES_VERSION}:sitemap={args.use_sitemap}:off={','.join(sorted(disabled))}"
+        fingerprints = FingerprintStore(cache_path, rules)
+    signals = None
+    if not args.no_signals:
+        signals = SignalStore(Path(args.signals_path) if args.signals_path else tmp_dir / "signals.sqlite")
+    cpu_settings = {'max_text_bytes': args.max_text_kb * 1024,
+                    'disabled_detectors': args.disable_detector,
+                    'fields': fields}
+    cpu_pool = None
+    if args.parse_processes > 0:
+        # spawn: forking a process that already runs fetch threads is unsafe
+        cpu_pool = ProcessPoolExecutor(max_workers=args.parse_processes,
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(cpu_settings,))
+    if replay is not None:
+        # Nothing touches the network: no caches, politeness or browsers
+        http_cache = limiter = dead_hosts = concurrency = render_pool = archive = None
+        args.retry_backoff = 0
+    else:
+        http_cache = http_cache_from_args(args)
+        limiter = rate_limiter_from_args(args)
+        dead_hosts = dead_host_cache_from_args(args)
+        concurrency = concurrency_from_args(args)
+        render_pool = render_pool_from_args(args, limiter, dead_hosts)
+        archive = archive_from_args(args)
+        if archive is not None:
+            print(f"🗄️  Archivando respuestas en: {archive.directory}\n")
+    # With the adaptive controller, --max-concurrency threads run and the controller gates their requests
+    io_workers = concurrency.maximum if concurrency is not None else args.io_workers
+    analyzer = WebsiteAnalyzer(lead_budget=args.lead_budget, use_sitemap=args.use_sitemap,
+                               http_cache=http_cache, pool_size=io_workers, limiter=limiter,
+                               dead_hosts=dead_hosts, concurrency=concurrency, render_pool=render_pool,
+                               archive=archive, replay=replay, fingerprints=fingerprints, cpu_pool=cpu_pool, **cpu_settings)
+    trimmed_bytes = 0
+    trimmed_lock = threading.Lock()
+    fan_out = DomainFanOut()
     
-    for i, lead in enumerate(leads, 1):
-        print(f"[{i}/{len(leads)}] {lead.get('name', 'Unknown')}")
-        
-        # Analyze website
-        website = lead.get('website', 'N/A')
+    def analyze_lead(lead: Dict) -> Dict:
+        # Analyze website (the probe's canonical URL when the leads were probed)
+        website = canonical_url(lead)
         business_name = lead.get('name', '')
         
-        analysis = analyzer.analyze_website(website, business_name)
-        
-        # Merge analysis with lead data
-        lead.update({
-            'pain_point': analysis['pain_point'],
-            'pain_point_details': analysis['pain_point_details'],
-            'proposed_solution': analysis['proposed_solution'],
-            'opportunity_score': analysis['opportunity_score'],
-            'owner_name': analysis['owner_name'],
-            'owner_email': analysis['owner_email'],
-            'owner_title': analysis['owner_title']
-        })
+        if website != 'N/A' and is_unreachable(lead):
+            # Known dead from probe_websites.py: no request at all
+            merge_analysis(lead, analyzer.unreachable_result(website, lead.get('site_probe_error', 'N/A')))
+            return lead
         
-        analyzed_leads.append(lead)
+        site = normalize_site(website)
         
-        # Small delay to avoid overwhelming servers
-        time.sleep(1)
+        def analyze() -> Dict:
+            nonlocal trimmed_bytes
+            analysis = analyzer.analyze_website(website, business_name)
+            with trimmed_lock:
+                trimmed_bytes += analysis.get('trimmed_bytes', 0)
+            if signals is not None and site and 'load_time' in analysis and analyzer.score_needed:
+                # The homepage was analyzed: keep what the score is computed from
+                signals.put(site, analysis['design_issues'], analysis['automation_gaps'],
+                            analysis['load_time'], analysis['analysis_partial'])
+            # Small delay to avoid overwhelming servers
+            if replay is None:
+                time.sleep(1)
+            return analysis
+        
+        # Leads sharing a site are analyzed once
+        analysis, _ = fan_out.run(site, analyze)
+        merge_analysis(lead, analysis)
+        return lead
+    
+    io_pool = ThreadPoolExecutor(max_workers=io_workers) if io_workers > 1 else None
+    
+    def run_pass(batch: Iterable[Dict], batch_total: Optional[int]) -> Iterator[Dict]:
+        if io_pool is not None:
+            results = ordered_map(io_pool, analyze_lead, batch, window=io_workers * 2)
+        else:
+            results = (analyze_lead(lead) for lead in batch)
+        for i, lead in enumerate(results, 1):
+            progress = f"{i}/{batch_total}" if batch_total is not None else f"{i}"
+            print(f"[{progress}] ✓ {lead.get('name', 'Unknown')}")
+            yield lead
+    
+    summary = AnalysisSummary()
+    writer = JsonlWriter(output_path) if streaming else None
+    analyzed_leads = []
+    
+    def emit(lead: Dict):
+        summary.add(lead)
+        if writer is not None:
+            writer.write(lead)
+        else:
+            analyzed_leads.append(lead)
+    
+    # Analyze each lead. Transient failures are held back for the retry lane
+    retry_queue = []
+    for lead in run_pass(leads, total):
+        if lead['fetch_status'] == 'transient_failure' and args.retries > 0:
+            retry_queue.append(lead)
+        else:
+            emit(lead)
+    
+    # Retry lane: transient failures get retried with backoff once the main
+    # pass is done, so slow sites never hold up healthy leads
+    for attempt in range(1, args.retries + 1):
+        pending = [lead for lead in retry_queue if lead['fetch_status'] == 'transient_failure']
+        if not pending:
+            break
+        delay = args.retry_backoff * 2 ** (attempt - 1)
+        print(f"\n🔁 Reintento {attempt}/{args.retries}: {len(pending)} leads con fallos transitorios (espera {delay:g}s)")
+        time.sleep(delay)
+        fan_out.clear()
+        for lead in run_pass(pending, len(pending)):
+            if lead['fetch_status'] == 'ok':
+                lead['fetch_status'] = 'recovered'
+    
+    for lead in retry_queue:
+        if lead['fetch_status'] == 'transient_failure':
+            lead['fetch_status'] = 'confirmed_failure'
+        emit(lead)
     
-    # Sort by opportunity score
-    analyzed_leads.sort(key=lambda x: x.get('opportunity_score', 0), reverse=True)
+    if io_pool is not None:
+        io_pool.shutdown()
+    if cpu_pool is not None:
+        cpu_pool.shutdown()
+    
+    if summary.total == 0:
+        print("❌ Error: No se encontraron leads en el archivo")
+        sys.exit(1)
     
     # Save results
-    save_results(analyzed_leads, output_path, args.output_format)
+    if writer is not None:
+        writer.close()
+        if args.sort:
+            print("\n🔃 Ordenando por opportunity_score (merge externo)...")
+            external_sort_jsonl(output_path)
+        print(f"\n✓ Resultados guardados en: {output_path}")
+    else:
+        # Sort by opportunity score
+        analyzed_leads.sort(key=lambda x: x.get('opportunity_score') or 0, reverse=True)
+        save_results(analyzed_leads, output_path, args.output_format)
     
     # Print summary
     print("\n" + "=" * 80)
@@ -684,25 +2099,82 @@ Examples:
     print("=" * 80)
     
     # Count pain points
-    pain_point_counts = {}
-    for lead in analyzed_leads:
-        pp = lead.get('pain_point', 'Unknown')
-        pain_point_counts[pp] = pain_point_counts.get(pp, 0) + 1
-    
     print(f"\nDistribución de Puntos de Dolor:")
-    for pp, count in sorted(pain_point_counts.items(), key=lambda x: x[1], reverse=True):
-        pct = (count / len(analyzed_leads)) * 100
+    for pp, count in sorted(summary.pain_point_counts.items(), key=lambda x: x[1], reverse=True):
+        pct = (count / summary.total) * 100
         print(f"  {pp}: {count} leads ({pct:.0f}%)")
     
+    if set(summary.fetch_counts) - {'ok'}:
+        print(f"\nEstado de Acceso:")
+        for status, count in sorted(summary.fetch_counts.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {status}: {count} leads")
+    
     # Top opportunities
     print(f"\nTop 5 Oportunidades (por score):")
-    for i, lead in enumerate(analyzed_leads[:5], 1):
+    for i, lead in enumerate(summary.top(), 1):
         print(f"  {i}. {lead.get('name')} - Score: {lead.get('opportunity_score')}/10")
         print(f"     Punto de dolor: {lead.get('pain_point')}")
         if lead.get('owner_name') != 'N/A':
             print(f"     Contacto: {lead.get('owner_name')} ({lead.get('owner_email')})")
     
-    print(f"\n✓ Análisis completado: {len(analyzed_leads)} leads procesados")
+    if analyzer.detector_costs:
+        print(f"\nCoste CPU por detector:")
+        for name, seconds in sorted(analyzer.detector_costs.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {name:<18} {seconds * 1000:8.1f} ms")
+    
+    if fan_out.reused:
+        print(f"\nWebs compartidas: {fan_out.summary()}")
+    
+    if analyzer.thin_pages:
+        rendered = render_pool.summary() if render_pool is not None else 'render desactivado'
+        print(f"\nPáginas JS (HTML estático casi vacío): {analyzer.thin_pages}, "
+              f"{analyzer.render_changed} cambiaron al renderizar; {rendered}")
+    if render_pool is not None:
+        render_pool.close()
+    
+    print(f"\nCodificación detectada por: {analyzer.charset_stats.summary()}")
+    
+    if len(analyzer.timing_stats):
+        print(f"\nTiempos por fase ({len(analyzer.timing_stats)} descargas; carga = connect+tls+ttfb+download):")
+        for line in analyzer.timing_stats.summary_lines():
+            print(f"  {line}")
+    
+    print(f"\nHTML recortado antes del análisis: {trimmed_bytes / 1024:.0f} KB")
+    
+    if fingerprints is not None:
+        print(f"\nCaché de contenido: {fingerprints.hits} sin cambios, {fingerprints.misses} re-analizados")
+        fingerprints.close()
+    
+    if signals is not None:
+        print(f"Señales guardadas: {signals.written} webs en {signals.path} (re-puntuar: rescore_leads.py)")
+        signals.close()
+    
+    dns_cache = enable_dns_cache()
+    print(f"Caché DNS: {dns_cache.hits} resoluciones reutilizadas, {dns_cache.misses} consultas")
+    
+    if http_cache is not None:
+        print(f"Caché HTTP: {http_cache.summary()}")
+        http_cache.close()
+    
+    if limiter is not None:
+        print(f"Límite por host ({args.host_rate:g} req/s): {limiter.summary()}")
+        limiter.close()
+    
+    if dead_hosts is not None:
+        print(f"Hosts caídos: {dead_hosts.summary()}")
+        dead_hosts.close()
+    
+    if concurrency is not None:
+        print(f"Concurrencia adaptativa: {concurrency.summary()}")
+    
+    if archive is not None:
+        print(f"Archivo WARC: {archive.records} registros en {archive.directory}")
+        archive.close()
+    
+    if replay is not None:
+        print(f"Replay: {replay.summary()}")
+    
+    print(f"\n✓ Análisis completado: {summary.total} leads procesados")
     print(f"✓ Archivo guardado: {output_path}")
     print("=" * 80 + "\n")
     
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Synthetic Site Farm Benchmark
+
+Generates thousands of fake business websites from the demo lead generators,
+serves them from a local HTTP server with configurable latency and failure
+modes, and runs WebsiteAnalyzer against them. Every site is built from a
+known spec (viewport, framework, chat widget, forms, owner page...), so the
+benchmark reports extraction accuracy next to throughput and latency.
+No network access is needed.
+
+Usage:
+    python benchmark_site_farm.py --sites 2000 --workers 16
+    python benchmark_site_farm.py --sites 200 --serve-only   # farm + leads file for analyze_pain_points.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+import demo_lead_generator
+import demo_vigo_legal
+from adaptive_concurrency import add_concurrency_arguments, concurrency_from_args
+from analyze_pain_points import WebsiteAnalyzer
+from deduplicate_leads import normalize_site
+from fetch_timing import percentile
+
+# Site features. Vendor names are the ones the detectors look for
+MODERN_FRAMEWORKS = ['react', 'vue', 'angular']
+CHAT_WIDGETS = ['tawk', 'intercom', 'crisp', 'tidio']
+FORM_VENDORS = ['typeform', 'jotform', 'hubspot']
+CRM_VENDORS = ['pipedrive', 'zoho']
+BOOKING_VENDORS = ['calendly', 'acuity']
+NEWSLETTER_VENDORS = ['sendinblue', 'convertkit']
+OWNER_PLACEMENTS = ['legal', 'team', 'structured_data', 'none']
+
+# Issue text emitted by each detector (prefixes of the analyzer's strings).
+# https is left out: the farm is plain HTTP, so it is always flagged
+DETECTOR_ISSUES = {
+    'viewport': ('No responsive',),
+    'slow_load': ('Carga lenta',),
+    'outdated_design': ('Tecnología obsoleta', 'Diseño anticuado'),
+    'meta_description': ('Sin meta description',),
+    'image_alt': ('Imágenes sin optimizar',),
+    'chatbot': ('Sin chatbot',),
+    'basic_forms': ('Formularios básicos',),
+    'booking': ('Sin sistema de reservas',),
+    'crm': ('Sin integración CRM',),
+    'email_marketing': ('Sin email marketing',),
+    'social_widgets': ('Sin integración de redes',),
+}
+
+# Body copy vetted not to contain any detector keyword
+FILLER = [
+    "Más de veinte años de experiencia al servicio de nuestros clientes.",
+    "Atendemos a particulares y empresas con un trato cercano y profesional.",
+    "Consulte sin compromiso: estudiamos cada caso de forma individual.",
+    "Trabajamos con transparencia, rigor y plazos claros desde el primer día.",
+]
+
+SLOW_EXTRA_SECONDS = 3.5  # pushes load time past the 3s slow_load threshold
+
+
+def build_site(index: int, rng: random.Random, slow_ratio: float, error_ratio: float,
+               hang_ratio: float, no_charset_ratio: float) -> Dict:
+    """
+    Build the spec of one synthetic site from a demo lead.
+
+    Returns:
+        Dictionary with the lead, the page features, the owner data and the
+        expected analyzer flags
+    """
+    # Half law firms (with owner data), half generic local businesses
+    if index % 2:
+        lead = demo_vigo_legal.generate_lead(index)
+        owner_name = lead['owner_name']
+    else:
+        business_type = rng.choice(list(demo_lead_generator.BUSINESS_TYPES))
+        lead = demo_lead_generator.generate_lead(business_type, 'New York', index)
+        owner_name = (f"{rng.choice(demo_vigo_legal.NOMBRES)} {rng.choice(demo_vigo_legal.APELLIDOS)} "
+                      f"{rng.choice(demo_vigo_legal.APELLIDOS)}")
+    domain = _ascii(''.join(c for c in lead['name'] if c.isalnum())) + '.es'
+
+    roll = rng.random()
+    if roll < error_ratio:
+        behavior = 'error'
+    elif roll < error_ratio + hang_ratio:
+        behavior = 'hang'
+    elif roll < error_ratio + hang_ratio + slow_ratio:
+        behavior = 'slow'
+    else:
+        behavior = 'ok'
+
+    framework = rng.choice(MODERN_FRAMEWORKS + ['frames'] + [None] * 4)
+    image_count = rng.randint(0, 4)
+    site = {
+        'id': index,
+        'lead': lead,
+        'domain': domain,
+        'behavior': behavior,
+        'charset': rng.random() >= no_charset_ratio,
+        'viewport': rng.random() < 0.7,
+        'framework': framework,
+        'copyright_year': rng.randint(2012, 2025),
+        'meta_description': rng.random() < 0.6,
+        'images': image_count,
+        'images_alt': rng.random() < 0.6,
+        'chat_widget': rng.choice(CHAT_WIDGETS + [None] * 4),
+        'form': rng.random() < 0.6,
+        'form_vendor': rng.choice(FORM_VENDORS + [None] * 3),
+        'crm': rng.choice(CRM_VENDORS + [None] * 4),
+        'booking': rng.choice(BOOKING_VENDORS + [None] * 3),
+        'newsletter': rng.choice(NEWSLETTER_VENDORS + [None] * 2),
+        'social_widget': rng.random() < 0.4,
+        'owner_placement': rng.choice(OWNER_PLACEMENTS),
+        'owner_name': owner_name,
+        'owner_email': None,
+    }
+    if framework == 'frames':
+        # A frameset page has no body: only head-level features survive
+        site.update({'images': 0, 'form': False, 'newsletter': None, 'social_widget': False})
+        if site['owner_placement'] in ('legal', 'team'):
+            site['owner_placement'] = 'none'
+    if site['owner_placement'] != 'none' and rng.random() < 0.6:
+        first, last = owner_name.split()[:2]
+        site['owner_email'] = f"{_ascii(first)}.{_ascii(last)}@{domain}"
+
+    # Sites without a declared charset: half are valid UTF-8, half legacy
+    # cp1252, so both the utf8 and the detected sniffing paths get exercised
+    site['encoding'] = 'utf-8' if site['charset'] or (index // 2) % 2 else 'cp1252'
+    site['expected'] = _expected_flags(site)
+    return site
+
+
+def _ascii(word: str) -> str:
+    """Lowercase a name part and strip Spanish accents (email local parts)"""
+    return word.lower().translate(str.maketrans('áéíóúñ', 'aeioun'))
+
+
+def _expected_flags(site: Dict) -> Dict[str, bool]:
+    """Ground truth: which detectors should flag this site"""
+    if site['framework'] == 'frames':
+        outdated = True
+    elif site['framework'] in MODERN_FRAMEWORKS:
+        outdated = False
+    else:
+        outdated = site['copyright_year'] < 2020
+
+    return {
+        'viewport': not site['viewport'],
+        'slow_load': site['behavior'] == 'slow',
+        'outdated_design': outdated,
+        'meta_description': not site['meta_description'],
+        'image_alt': site['images'] > 0 and not site['images_alt'],
+        'chatbot': site['chat_widget'] is None,
+        'basic_forms': site['form'] and site['form_vendor'] is None,
+        'booking': site['booking'] is None,
+        'crm': site['crm'] is None and not (site['form'] and site['form_vendor'] == 'hubspot'),
+        'email_marketing': site['newsletter'] is None,
+        'social_widgets': not site['social_widget'],
+    }
+
+
+def render_homepage(site: Dict) -> str:
+    """HTML of the site's homepage"""
+    lead = site['lead']
+    head = ['<meta charset="utf-8">'] if site['charset'] else []
+    head.append(f"<title>{lead['name']}</title>")
+    if site['viewport']:
+        head.append('<meta name="viewport" content="width=device-width, initial-scale=1">')
+    if site['meta_description']:
+        head.append(f'<meta name="description" content="{lead["category"]} en {lead["address"]}">')
+    if site['framework'] in MODERN_FRAMEWORKS:
+        head.append(f'<script src="/static/{site["framework"]}.production.min.js"></script>')
+    for vendor in (site['chat_widget'], site['booking'], site['crm']):
+        if vendor:
+            head.append(f'<script async src="https://embed.{vendor}.example/widget.js"></script>')
+    if site['owner_placement'] == 'structured_data':
+        founder = {'@type': 'Person', 'name': site['owner_name'], 'jobTitle': 'Socio Director'}
+        if site['owner_email']:
+            founder['email'] = site['owner_email']
+        payload = {'@context': 'https://schema.org', '@type': 'LocalBusiness',
+                   'name': lead['name'], 'telephone': lead['phone'], 'founder': founder}
+        head.append(f'<script type="application/ld+json">{json.dumps(payload, ensure_ascii=False)}</script>')
+
+    if site['framework'] == 'frames':
+        return (f"<html><head>{''.join(head)}</head>"
+                f'<frameset cols="20%,80%"><frame src="menu"><frame src="main"></frameset></html>')
+
+    body = [f"<h1>{lead['name']}</h1>"]
+    body.extend(f"<p>{line}</p>" for line in FILLER)
+    body.append(f"<p>{lead['address']} · {lead['phone']}</p>")
+    for n in range(site['images']):
+        alt = f' alt="{lead["name"]} {n}"' if site['images_alt'] else ''
+        body.append(f'<img src="/static/img{n}.jpg"{alt}>')
+    if site['form']:
+        vendor = f' data-provider="{site["form_vendor"]}"' if site['form_vendor'] else ''
+        body.append(f'<form action="enviar" method="post"{vendor}><input name="nombre"><button>Enviar</button></form>')
+    if site['newsletter']:
+        body.append(f'<div class="{site["newsletter"]}-signup">Newsletter</div>')
+    if site['social_widget']:
+        body.append('<div class="facebook-feed"></div>')
+    body.append('<nav><a href="equipo">Equipo</a> <a href="aviso-legal">Aviso legal</a></nav>')
+    body.append(f"<footer>© {site['copyright_year']} {lead['name']}</footer>")
+
+    return f"<!DOCTYPE html><html><head>{''.join(head)}</head><body>{''.join(body)}</body></html>"
+
+
+def render_subpage(site: Dict, page: str) -> str:
+    """HTML of the team ('equipo') or legal notice ('aviso-legal') page"""
+    lead = site['lead']
+    lines = list(FILLER[:2])
+    email = f" Correo: {site['owner_email']}." if site['owner_email'] else ''
+    if page == 'equipo' and site['owner_placement'] == 'team':
+        lines.append(f"{site['owner_name']}, Socio fundador.{email}")
+    elif page == 'aviso-legal':
+        lines.append(f"Denominación: {lead['name']}.")
+        if site['owner_placement'] == 'legal':
+            lines.append(f"Titular: {site['owner_name']}.{email}")
+    body = ''.join(f"<p>{line}</p>" for line in lines)
+    head = '<meta charset="utf-8">' if site['charset'] else ''
+    return f'<!DOCTYPE html><html><head>{head}</head><body>{body}</body></html>'
+
+
+class SiteFarmHandler(BaseHTTPRequestHandler):
+    """Serves /s/<id>/, /s/<id>/equipo and /s/<id>/aviso-legal from the farm"""
+
+    sites: Dict[int, Dict] = {}
+    latency = (0.05, 0.03)  # (mean seconds, jitter seconds)
+    hang_seconds = 6.0
+
+    def do_GET(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        site = None
+        if len(parts) >= 2 and parts[0] == 's' and parts[1].isdigit():
+            site = self.sites.get(int(parts[1]))
+        page = parts[2] if len(parts) > 2 else ''
+
+        mean, jitter = self.latency
+        time.sleep(max(0.0, random.uniform(mean - jitter, mean + jitter)))
+
+        if site is None or page not in ('', 'equipo', 'aviso-legal'):
+            return self._reply(404, '<html><body>No encontrado</body></html>', True)
+        if site['behavior'] == 'error':
+            return self._reply(500, '<html><body>Error interno</body></html>', True)
+        if site['behavior'] == 'hang':
+            time.sleep(self.hang_seconds)
+        if site['behavior'] == 'slow' and not page:
+            time.sleep(SLOW_EXTRA_SECONDS)
+
+        html = render_subpage(site, page) if page else render_homepage(site)
+        self._reply(200, html, site['charset'], site['encoding'])
+
+    def _reply(self, status: int, html: str, charset: bool, encoding: str = 'utf-8'):
+        body = html.encode(encoding)
+        try:
+            self.send_response(status)
+            # Some sites declare no charset anywhere (no header, no meta) so
+            # the sniffing fallbacks get exercised
+            self.send_header('Content-Type', 'text/html; charset=utf-8' if charset else 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FarmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_farm(sites: List[Dict], port: int, latency_ms: float, jitter_ms: float,
+               hang_seconds: float) -> tuple:
+    """
+    Start the farm server in a background thread.
+
+    Returns:
+        (server, base URL)
+    """
+    SiteFarmHandler.sites = {site['id']: site for site in sites}
+    SiteFarmHandler.latency = (latency_ms / 1000, jitter_ms / 1000)
+    SiteFarmHandler.hang_seconds = hang_seconds
+    server = FarmServer(('127.0.0.1', port), SiteFarmHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def score_results(runs: List[tuple]) -> Dict:
+    """
+    Compare analyzer output against each site's spec.
+
+    Args:
+        runs: (site, analysis, seconds) per analyzed site
+
+    Returns:
+        Dictionary with per-detector confusion counts and owner/error accuracy
+    """
+    detectors = {name: {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0} for name in DETECTOR_ISSUES}
+    owner = {'name_ok': 0, 'name_total': 0, 'email_ok': 0, 'email_total': 0, 'false_names': 0}
+    errors = {'ok': 0, 'total': 0}
+
+    for site, analysis, _ in runs:
+        if site['behavior'] in ('error', 'hang'):
+            expected_pp = 'Error de Acceso' if site['behavior'] == 'error' else 'Rendimiento Crítico'
+            errors['total'] += 1
+            errors['ok'] += analysis['pain_point'] == expected_pp
+            continue
+
+        issues = analysis['design_issues'] + analysis['automation_gaps']
+        for name, prefixes in DETECTOR_ISSUES.items():
+            flagged = any(issue.startswith(prefixes) for issue in issues)
+            expected = site['expected'][name]
+            key = ('t' if flagged == expected else 'f') + ('p' if flagged else 'n')
+            detectors[name][key] += 1
+
+        if site['owner_placement'] == 'none':
+            owner['false_names'] += analysis['owner_name'] != 'N/A'
+        else:
+            owner['name_total'] += 1
+            owner['name_ok'] += analysis['owner_name'] == site['owner_name']
+        if site['owner_email']:
+            owner['email_total'] += 1
+            owner['email_ok'] += analysis['owner_email'] == site['owner_email']
+
+    return {'detectors': detectors, 'owner': owner, 'errors': errors}
+
+
+def run_benchmark(sites: List[Dict], base_url: str, workers: int, analyzer: WebsiteAnalyzer) -> tuple:
+    """
+    Analyze every site of the farm.
+
+    Returns:
+        ([(site, analysis, seconds)], wall-clock seconds)
+    """
+    def analyze(site: Dict) -> tuple:
+        started = time.perf_counter()
+        analysis = analyzer.analyze_website(f"{base_url}/s/{site['id']}/", site['lead']['name'])
+        return site, analysis, time.perf_counter() - started
+
+    started = time.perf_counter()
+    runs = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, run in enumerate(pool.map(analyze, sites), 1):
+            runs.append(run)
+            if i % 100 == 0 or i == len(sites):
+                print(f"  [{i}/{len(sites)}] {i / (time.perf_counter() - started):.1f} sitios/s")
+    return runs, time.perf_counter() - started
+
+
+def print_report(report: Dict):
+    """Print throughput, latency and accuracy"""
+    print("\n" + "=" * 80)
+    print("RESULTADOS DEL BENCHMARK")
+    print("=" * 80)
+    print(f"Sitios: {report['sites']}  |  Workers: {report['workers']}  |  Tiempo total: {report['wall_seconds']:.1f}s")
+    print(f"Throughput: {report['throughput']:.2f} sitios/s")
+    if report['adaptive_concurrency']:
+        print(f"Concurrencia adaptativa: {report['adaptive_concurrency']}")
+
+    latency = report['latency']
+    print(f"\nLatencia por sitio (s): p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"Fases por descarga (ms):")
+    for phase, p in report['fetch_phases_ms'].items():
+        print(f"  {phase:<9} p50 {p[50]:7.0f}  p90 {p[90]:7.0f}  p99 {p[99]:7.0f}")
+
+    print(f"\nPrecisión por detector:")
+    print(f"  {'detector':<18} {'acierto':>8} {'precisión':>10} {'recall':>8}   FP    FN")
+    for name, c in report['accuracy']['detectors'].items():
+        total = sum(c.values())
+        accuracy = (c['tp'] + c['tn']) / total if total else 0
+        precision = c['tp'] / (c['tp'] + c['fp']) if c['tp'] + c['fp'] else 1
+        recall = c['tp'] / (c['tp'] + c['fn']) if c['tp'] + c['fn'] else 1
+        print(f"  {name:<18} {accuracy:>7.1%} {precision:>10.1%} {recall:>8.1%} {c['fp']:>5} {c['fn']:>5}")
+
+    owner = report['accuracy']['owner']
+    errors = report['accuracy']['errors']
+    print(f"\nDecisor:")
+    print(f"  Nombre correcto: {owner['name_ok']}/{owner['name_total']}"
+          f" ({owner['name_ok'] / max(owner['name_total'], 1):.1%})")
+    print(f"  Email correcto:  {owner['email_ok']}/{owner['email_total']}"
+          f" ({owner['email_ok'] / max(owner['email_total'], 1):.1%})")
+    print(f"  Nombres inventados (sitios sin decisor): {owner['false_names']}")
+    print(f"\nSitios con error/timeout clasificados bien: {errors['ok']}/{errors['total']}")
+    print(f"Codificación detectada por: {', '.join(f'{k} {v}' for k, v in report['charset_paths'].items())}")
+    print("=" * 80 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark WebsiteAnalyzer against a local farm of synthetic sites",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_site_farm.py --sites 2000 --workers 16
+  python benchmark_site_farm.py --sites 500 --latency-ms 200 --jitter-ms 150 --error-ratio 0.1
+  python benchmark_site_farm.py --sites 200 --serve-only --port 8800
+        """
+    )
+
+    parser.add_argument('--sites', '-n', type=int, default=1000,
+                        help='Number of synthetic sites (default: 1000)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed; the same seed builds the same farm (default: 42)')
+    parser.add_argument('--workers', '-w', type=int, default=16,
+                        help='Concurrent analyses (default: 16)')
+    parser.add_argument('--port', type=int, default=0,
+                        help='Farm server port, 0 picks a free one (default: 0)')
+    parser.add_argument('--latency-ms', type=float, default=50,
+                        help='Mean response latency per request (default: 50)')
+    parser.add_argument('--jitter-ms', type=float, default=30,
+                        help='Uniform latency jitter, +/- (default: 30)')
+    parser.add_argument('--slow-ratio', type=float, default=0.05,
+                        help=f'Share of sites whose homepage takes an extra {SLOW_EXTRA_SECONDS:g}s (default: 0.05)')
+    parser.add_argument('--error-ratio', type=float, default=0.03,
+                        help='Share of sites answering HTTP 500 (default: 0.03)')
+    parser.add_argument('--hang-ratio', type=float, default=0.01,
+                        help='Share of sites that stall past the analyzer timeout (default: 0.01)')
+    parser.add_argument('--no-charset-ratio', type=float, default=0.1,
+                        help='Share of sites declaring no charset (header or meta), half of them '
+                             'in cp1252 (default: 0.1)')
+    parser.add_argument('--timeout', type=int, default=5,
+                        help='Analyzer per-request timeout in seconds (default: 5)')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='Analyzer parse pool size, as in analyze_pain_points.py (default: 0)')
+    parser.add_argument('--serve-only', action='store_true',
+                        help='Only run the farm and write a leads file for analyze_pain_points.py')
+    add_concurrency_arguments(parser)
+
+    args = parser.parse_args()
+
+    # Build the farm (the demo generators use the global random module)
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+    sites = [build_site(i, rng, args.slow_ratio, args.error_ratio, args.hang_ratio, args.no_charset_ratio)
+             for i in range(1, args.sites + 1)]
+    server, base_url = start_farm(sites, args.port, args.latency_ms, args.jitter_ms,
+                                  hang_seconds=args.timeout + 1)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    tmp_dir = Path(__file__).parent.parent / ".tmp"
+    tmp_dir.mkdir(exist_ok=True)
+
+    print("=" * 80)
+    print("BENCHMARK - GRANJA DE SITIOS SINTÉTICOS")
+    print("=" * 80)
+    print(f"Sitios: {len(sites)}  |  Servidor: {base_url}")
+    print(f"Latencia: {args.latency_ms:g}±{args.jitter_ms:g} ms  |  Lentos: {args.slow_ratio:.0%}  |  "
+          f"Errores: {args.error_ratio:.0%}  |  Colgados: {args.hang_ratio:.0%}")
+    print("=" * 80 + "\n")
+
+    if args.serve_only:
+        leads = []
+        for site in sites:
+            lead = dict(site['lead'])
+            lead['website'] = f"{base_url}/s/{site['id']}/"
+            leads.append(lead)
+        # Every site lives under its own path of the one farm host; the
+        # pipeline's fan-out must see them as distinct sites or it would
+        # analyze one and copy it to the rest
+        distinct = len({normalize_site(lead['website']) for lead in leads})
+        if distinct != len(sites):
+            print(f"❌ Error: {distinct} webs distintas para {len(sites)} sitios; "
+                  f"analyze_pain_points.py no analizaría cada sitio")
+            server.shutdown()
+            return 1
+        leads_path = tmp_dir / f"site_farm_leads_{timestamp}.json"
+        with open(leads_path, 'w', encoding='utf-8') as f:
+            json.dump({'generated_at': datetime.now().isoformat(), 'total_leads': len(leads),
+                       'note': 'Synthetic site farm - not real businesses', 'leads': leads},
+                      f, indent=2, ensure_ascii=False)
+        print(f"💾 Leads de la granja: {leads_path} ({distinct} webs distintas, una por sitio)")
+        print("🌐 Sirviendo sitios. Ctrl+C para parar.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+            return 0
+
+    cpu_pool = None
+    if args.parse_processes > 0:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from analyze_pain_points import _init_worker
+        cpu_pool = ProcessPoolExecutor(max_workers=args.parse_processes,
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=({},))
+    concurrency = concurrency_from_args(args)
+    workers = concurrency.maximum if concurrency is not None else args.workers
+    analyzer = WebsiteAnalyzer(timeout=args.timeout, cpu_pool=cpu_pool, pool_size=workers,
+                               concurrency=concurrency)
+
+    print("⏱️  Analizando granja...")
+    runs, wall_seconds = run_benchmark(sites, base_url, workers, analyzer)
+    server.shutdown()
+    if cpu_pool is not None:
+        cpu_pool.shutdown()
+
+    latencies = [seconds for _, _, seconds in runs]
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'settings': vars(args),
+        'sites': len(runs),
+        'workers': workers,
+        'adaptive_concurrency': concurrency.summary() if concurrency is not None else None,
+        'wall_seconds': wall_seconds,
+        'throughput': len(runs) / wall_seconds if wall_seconds else 0,
+        'latency': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                    'p99': percentile(latencies, 99), 'max': max(latencies, default=0)},
+        'accuracy': score_results(runs),
+        'detector_cpu_seconds': analyzer.detector_costs,
+        'charset_paths': analyzer.charset_stats.counts,
+        'fetch_phases_ms': analyzer.timing_stats.percentiles(),
+    }
+    print_report(report)
+
+    report_path = tmp_dir / f"benchmark_site_farm_{timestamp}.json"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Informe guardado en: {report_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,10 +15,16 @@ import json
 import csv
 import time
 import os
+import shutil
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor
 
+from host_rate_limiter import HostRateLimiter, add_rate_limit_arguments, rate_limiter_from_args
+from dead_hosts import DeadHostCache, DeadHostError, add_dead_host_arguments, dead_host_cache_from_args
+from probe_websites import canonical_url, is_unreachable
+from deduplicate_leads import normalize_site
+
 try:
     from selenium import webdriver
     from selenium.webdriver.chrome.options import Options
@@ -43,22 +49,61 @@ def setup_driver(headless: bool = True):
     driver.set_page_load_timeout(15) # 15s timeout
     return driver
 
-def capture_single_site(url: str, name: str, output_dir: Path) -> Dict:
+def check_site(url: str, dead_hosts: Optional[DeadHostCache] = None) -> Optional[str]:
+    """
+    Cheap pre-check so dead sites never start a browser, from what earlier
+    stages recorded (no request is sent; probed-unreachable leads are skipped
+    before this). Only connection-level failures count (DNS, refused, TLS,
+    connect timeout): an HTTP error page such as a 403 bot block still gets
+    its screenshot.
+    
+    Returns:
+        Error message, or None if the site is not known dead
+    """
+    if dead_hosts is None:
+        return None
+    try:
+        dead_hosts.check(url)
+    except DeadHostError as e:
+        return str(e)
+    return None
+
+def screenshot_path_for(name: str, output_dir: Path) -> Path:
+    """Screenshot file of a lead (safe filename from its name)"""
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '_', '-')).strip().replace(" ", "_")
+    return output_dir / f"{safe_name}.png"
+
+def share_capture(result: Dict, name: str, output_dir: Path) -> Dict:
+    """Give a lead the capture taken for another lead with the same site"""
+    if result['status'] not in ('success', 'exists', 'shared'):
+        return {**result, "name": name}
+    screenshot_path = screenshot_path_for(name, output_dir)
+    if not screenshot_path.exists():
+        shutil.copyfile(result['path'], screenshot_path)
+    return {"name": name, "status": "shared", "path": str(screenshot_path)}
+
+def capture_single_site(url: str, name: str, output_dir: Path,
+                        limiter: Optional[HostRateLimiter] = None,
+                        dead_hosts: Optional[DeadHostCache] = None) -> Dict:
     """Capture screenshot for a single site"""
     if url == "N/A" or not url.startswith("http"):
         return {"name": name, "status": "no_url"}
     
-    # Safe filename
-    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '_', '-')).strip().replace(" ", "_")
-    screenshot_path = output_dir / f"{safe_name}.png"
+    screenshot_path = screenshot_path_for(name, output_dir)
     
     if screenshot_path.exists():
         return {"name": name, "status": "exists", "path": str(screenshot_path)}
 
+    error = check_site(url, dead_hosts)
+    if error:
+        return {"name": name, "status": "error", "error": error}
+
     driver = None
     try:
         driver = setup_driver(headless=True)
         print(f"📸 Capturing: {name} ({url})...")
+        if limiter is not None:
+            limiter.acquire(url)
         driver.get(url)
         time.sleep(2) # Wait for animations
         
@@ -89,7 +134,8 @@ def capture_single_site(url: str, name: str, output_dir: Path) -> Dict:
         if driver:
             driver.quit()
 
-def process_leads(leads: List[Dict], output_dir: Path, max_workers: int = 3):
+def process_leads(leads: List[Dict], output_dir: Path, max_workers: int = 3,
+                  limiter: Optional[HostRateLimiter] = None, dead_hosts: Optional[DeadHostCache] = None):
     """Process visual capture for all leads"""
     print(f"🖼️  Starting screenshot capture for {len(leads)} leads...")
     print(f"📂 Output directory: {output_dir}")
@@ -102,18 +148,37 @@ def process_leads(leads: List[Dict], output_dir: Path, max_workers: int = 3):
     # Using small pool to not overload system/network
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = []
+        by_site = {}    # normalized site (domain plus path) -> capture future
+        sharing = []    # (lead name, capture future of its site)
         for lead in leads:
-            url = lead.get('website', 'N/A')
+            url = canonical_url(lead)
             name = lead.get('name', 'Unknown')
-            futures.append(executor.submit(capture_single_site, url, name, output_dir))
+            if url != 'N/A' and is_unreachable(lead):
+                # probe_websites.py already found it dead: no browser
+                results.append({"name": name, "status": "unreachable",
+                                "error": lead.get('site_probe_error', 'N/A')})
+                continue
+            # One browser capture per site, copied to the other leads sharing it
+            site = normalize_site(url)
+            if site in by_site:
+                sharing.append((name, by_site[site]))
+                continue
+            future = executor.submit(capture_single_site, url, name, output_dir, limiter, dead_hosts)
+            futures.append(future)
+            if site:
+                by_site[site] = future
             
         for future in futures:
             results.append(future.result())
+        for name, future in sharing:
+            results.append(share_capture(future.result(), name, output_dir))
             
     # Summary
     success = sum(1 for r in results if r['status'] == 'success')
     errors = sum(1 for r in results if r['status'] == 'error')
     skipped = sum(1 for r in results if r['status'] == 'no_url')
+    unreachable = sum(1 for r in results if r['status'] == 'unreachable')
+    shared = sum(1 for r in results if r['status'] == 'shared')
     
     print("\n" + "="*40)
     print("SCREENSHOT CAPTURE SUMMARY")
@@ -121,6 +186,12 @@ def process_leads(leads: List[Dict], output_dir: Path, max_workers: int = 3):
     print(f"✓ Success: {success}")
     print(f"❌ Errors: {errors}")
     print(f"⏩ Skipped (No URL): {skipped}")
+    print(f"⏩ Skipped (Unreachable): {unreachable}")
+    print(f"🔗 Shared site (browser runs avoided): {len(sharing)} ({shared} copied)")
+    if limiter is not None:
+        print(f"🚦 Host rate limit: {limiter.summary()}")
+    if dead_hosts is not None:
+        print(f"💀 Dead hosts: {dead_hosts.summary()}")
     print("="*40 + "\n")
 
     return results
@@ -150,6 +221,8 @@ def main():
     parser.add_argument('--input', required=True, help="Input leads file")
     parser.add_argument('--output-dir', default='.tmp/screenshots', help="Directory to save images")
     parser.add_argument('--workers', type=int, default=2, help="Parallel workers")
+    add_rate_limit_arguments(parser)
+    add_dead_host_arguments(parser)
     
     args = parser.parse_args()
     
@@ -165,7 +238,15 @@ def main():
         print("❌ No leads found.")
         sys.exit(1)
         
-    process_leads(leads, output_dir, args.workers)
+    limiter = rate_limiter_from_args(args)
+    dead_hosts = dead_host_cache_from_args(args)
+    try:
+        process_leads(leads, output_dir, args.workers, limiter, dead_hosts)
+    finally:
+        if limiter is not None:
+            limiter.close()
+        if dead_hosts is not None:
+            dead_hosts.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Charset Sniffing
+
+Picks the text encoding of a fetched page the way browsers do, cheapest
+evidence first, so the statistical detector (chardet / charset_normalizer,
+slow on large pages) only runs when nothing else answers:
+
+1. bom       byte order mark
+2. header    charset= in the Content-Type header
+3. meta      <meta charset> / http-equiv Content-Type in the first SNIFF_BYTES
+4. utf8      the body is valid UTF-8 (one fast strict decode)
+5. detected  statistical detection on the first DETECT_BYTES
+
+requests itself answers ISO-8859-1 for any text/* response without a
+charset, which garbles the accents of older Spanish sites; those pages land
+in step 3 or 4 here instead. Like browsers, ISO-8859-1 is read as cp1252.
+Detectors cannot tell the Western single-byte code pages apart on Spanish
+text (cp1250 turns ñ into ń), so step 5 only overrides the regional
+default, cp1252, when it finds a script that cp1252 cannot hold.
+
+Usage:
+    from charset_sniffing import CharsetStats, decode_response
+
+    stats = CharsetStats()
+    html = decode_response(response, stats)   # also sets response.encoding
+    print(stats.summary())
+"""
+
+import codecs
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+
+SNIFF_BYTES = 4096
+DETECT_BYTES = 65536
+
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# Matches <meta charset="x"> and <meta http-equiv="Content-Type" content="text/html; charset=x">
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+
+# Labels browsers decode with a superset encoding, keyed by codec name
+# (_usable looks aliases up after codecs.lookup, so 'latin-1' is 'iso8859-1')
+ENCODING_ALIASES = {codecs.lookup(label).name: 'cp1252' for label in ('iso-8859-1', 'latin-1', 'ascii')}
+
+SNIFF_PATHS = ['bom', 'header', 'meta', 'utf8', 'detected']
+
+# What a browser in Spain assumes for legacy pages
+DEFAULT_ENCODING = 'cp1252'
+# Detector answers trusted over DEFAULT_ENCODING: multi-byte, Cyrillic, Greek
+NON_WESTERN_PREFIXES = ('utf', 'gb', 'big5', 'shift_jis', 'euc', 'iso2022', 'cp932', 'cp949',
+                        'cp950', 'koi8', 'cp1251', 'iso8859-5', 'cp1253', 'iso8859-7')
+
+
+def _usable(label: str) -> Optional[str]:
+    """Python codec name for a charset label, or None if unknown"""
+    try:
+        name = codecs.lookup(label.strip()).name
+    except LookupError:
+        return None
+    return ENCODING_ALIASES.get(name, name)
+
+
+def sniff_encoding(content: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Encoding of a page body.
+
+    Args:
+        content: Raw body bytes
+        content_type: Content-Type header value, if any
+
+    Returns:
+        (codec name, path that decided it: one of SNIFF_PATHS)
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding, 'bom'
+
+    match = HEADER_CHARSET.search(content_type or '')
+    if match and _usable(match.group(1)):
+        return _usable(match.group(1)), 'header'
+
+    match = META_CHARSET.search(content[:SNIFF_BYTES])
+    if match and _usable(match.group(1).decode('ascii', 'ignore')):
+        return _usable(match.group(1).decode('ascii')), 'meta'
+
+    try:
+        content.decode('utf-8')
+        return 'utf-8', 'utf8'
+    except UnicodeDecodeError:
+        pass
+
+    detected = requests.compat.chardet.detect(content[:DETECT_BYTES])['encoding']
+    encoding = _usable(detected) if detected else None
+    if encoding is None or not encoding.startswith(NON_WESTERN_PREFIXES):
+        encoding = DEFAULT_ENCODING
+    return encoding, 'detected'
+
+
+class CharsetStats:
+    """How often each sniffing path decided a page's encoding"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {path: 0 for path in SNIFF_PATHS}
+
+    def record(self, path: str):
+        with self.lock:
+            self.counts[path] += 1
+
+    def summary(self) -> str:
+        return ', '.join(f"{path} {count}" for path, count in self.counts.items())
+
+
+def sniff_response(response: requests.Response, stats: Optional[CharsetStats] = None) -> str:
+    """
+    Set response.encoding from the sniffed charset (so response.text never
+    falls back to requests' own detection) and return it.
+    """
+    encoding, path = sniff_encoding(response.content, response.headers.get('Content-Type'))
+    response.encoding = encoding
+    if stats is not None:
+        stats.record(path)
+    return encoding
+
+
+def decode_response(response: requests.Response, stats: Optional[CharsetStats] = None) -> str:
+    """Body of response as text, decoded with the sniffed charset"""
+    sniff_response(response, stats)
+    return response.text
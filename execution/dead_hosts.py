@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Dead Host Negative Cache
+
+Persists hosts whose connections failed (NXDOMAIN, refused, TLS failure,
+connect timeout) with the failure type and an expiry. Sessions built by
+http_fetcher.create_session(dead_hosts=...) consult it before connecting,
+so a known-dead site fails in microseconds with DeadHostError instead of
+costing a full timeout in every stage and on every rerun.
+
+Usage:
+    from dead_hosts import DeadHostCache
+    from http_fetcher import create_session
+
+    dead_hosts = DeadHostCache(Path(".tmp/dead_hosts.sqlite"))
+    session = create_session(dead_hosts=dead_hosts)
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from host_rate_limiter import host_key
+
+# Default location, shared by every stage and run on this machine
+DEFAULT_DEAD_HOSTS_PATH = Path(__file__).parent.parent / ".tmp" / "dead_hosts.sqlite"
+
+# failure type -> (hours the host stays blocked, failures needed before blocking).
+# A single connect timeout can be a blip, so it must happen twice
+FAILURE_POLICY = {
+    'dns': (24, 1),
+    'refused': (6, 1),
+    'tls': (24, 1),
+    'connect_timeout': (2, 2),
+}
+
+DNS_ERROR_MARKERS = ['name or service not known', 'nodename nor servname', 'getaddrinfo failed',
+                     'name resolution', 'no address associated']
+
+
+def dead_host_key(url: str) -> str:
+    """Record key for url: host_key plus the port when one is given (refusals are per port)"""
+    port = urlparse(url).port
+    return f"{host_key(url)}:{port}" if port else host_key(url)
+
+
+class DeadHostError(requests.ConnectionError):
+    """Raised instead of connecting to a host recorded as dead"""
+
+
+def classify_connection_error(error: requests.ConnectionError) -> Optional[str]:
+    """Failure type of a connection error, or None if it does not mean the host is dead"""
+    if isinstance(error, requests.exceptions.SSLError):
+        return 'tls'
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return 'connect_timeout'
+    message = str(error).lower()
+    if any(marker in message for marker in DNS_ERROR_MARKERS):
+        return 'dns'
+    if 'connection refused' in message or 'errno 111' in message:
+        return 'refused'
+    return None
+
+
+class DeadHostCache:
+    """SQLite-backed map of host -> recent connection failure"""
+
+    def __init__(self, path: Path = DEFAULT_DEAD_HOSTS_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.short_circuits = 0
+        self.recorded = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS dead_hosts (
+                host TEXT PRIMARY KEY,
+                failure_type TEXT NOT NULL,
+                error TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                failed_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("DELETE FROM dead_hosts WHERE expires_at < ?", (time.time(),))
+        self.conn.commit()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Unexpired failure record for url's host, blocking or not"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT failure_type, error, failures, expires_at FROM dead_hosts WHERE host = ? AND expires_at > ?",
+                (dead_host_key(url), time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        failure_type, error, failures, expires_at = row
+        return {
+            'failure_type': failure_type,
+            'error': error,
+            'failures': failures,
+            'expires_at': expires_at,
+            'blocking': failures >= FAILURE_POLICY.get(failure_type, (0, 1))[1],
+        }
+
+    def check(self, url: str) -> Optional[Dict]:
+        """
+        Raise DeadHostError if url's host is known dead.
+
+        Returns:
+            The non-blocking record (a first connect timeout), if any
+        """
+        entry = self.lookup(url)
+        if entry is not None and entry['blocking']:
+            with self.lock:
+                self.short_circuits += 1
+            raise DeadHostError(f"Host caído (caché {entry['failure_type']}): {entry['error']}")
+        return entry
+
+    def record_failure(self, url: str, error: requests.ConnectionError) -> Optional[str]:
+        """
+        Record a connection failure if it means the host is dead.
+
+        Returns:
+            The failure type recorded, or None
+        """
+        failure_type = classify_connection_error(error)
+        if failure_type is None:
+            return None
+        hours, _ = FAILURE_POLICY[failure_type]
+        now = time.time()
+        host = dead_host_key(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT failures FROM dead_hosts WHERE host = ? AND failure_type = ? AND expires_at > ?",
+                (host, failure_type, now)
+            ).fetchone()
+            failures = (row[0] if row else 0) + 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dead_hosts VALUES (?, ?, ?, ?, ?, ?)",
+                (host, failure_type, str(error)[:200], failures, now, now + hours * 3600)
+            )
+            self.conn.commit()
+            self.recorded += 1
+        return failure_type
+
+    def clear(self, url: str):
+        """Forget url's host (it answered)"""
+        with self.lock:
+            self.conn.execute("DELETE FROM dead_hosts WHERE host = ?", (dead_host_key(url),))
+            self.conn.commit()
+
+    def summary(self) -> str:
+        return f"{self.short_circuits} conexiones evitadas, {self.recorded} fallos registrados"
+
+    def close(self):
+        self.conn.close()
+
+
+def add_dead_host_arguments(parser: argparse.ArgumentParser):
+    """Add --no-dead-host-cache to a script's CLI"""
+    parser.add_argument(
+        '--no-dead-host-cache',
+        action='store_true',
+        help='Connect even to hosts that recently failed with DNS/refused/TLS/connect timeout errors'
+    )
+
+
+def dead_host_cache_from_args(args: argparse.Namespace) -> Optional[DeadHostCache]:
+    """DeadHostCache unless disabled with --no-dead-host-cache"""
+    if args.no_dead_host_cache:
+        return None
+    return DeadHostCache(DEFAULT_DEAD_HOSTS_PATH)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Fetch Phase Timing
+
+Splits the wall time of a website fetch into phases, so a slow result can be
+pinned on our side (queueing, DNS) or on the site (connect, TLS, server
+wait, transfer):
+
+- queue     waiting for the host rate limit and a concurrency slot
+- dns       name resolution (near 0 when the DNS cache answers)
+- connect   TCP handshake
+- tls       TLS handshake and certificate checks
+- ttfb      request sent -> response headers (server think time)
+- download  reading the body
+
+Every phase is exclusive of the ones nested in it (connect excludes the DNS
+lookup it triggers, ttfb excludes connect and TLS...), so the phases add up
+to the fetch. Redirect hops add to the same phases. Reused keep-alive
+connections simply show 0 connect/TLS.
+
+Timing is per thread and only active inside measure(); the hooks in
+http_fetcher (DNS cache, adapters, connection classes) are no-ops outside.
+
+Usage:
+    from fetch_timing import measure
+
+    with measure() as timer:
+        response = session.get(url, stream=True)
+        with timer.phase('download'):
+            body = response.content
+    timer.ms()             # {'queue': 0, 'dns': 12, 'connect': 31, ...}
+    timer.server_seconds()  # connect + tls + ttfb + download
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+PHASES = ['queue', 'dns', 'connect', 'tls', 'ttfb', 'download']
+# What the site is responsible for: our queueing and our resolver are not
+SERVER_PHASES = ['connect', 'tls', 'ttfb', 'download']
+
+_local = threading.local()
+
+
+class PhaseTimer:
+    """Phase durations of the requests one thread makes inside measure()"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+
+    def mark(self) -> Tuple[float, float]:
+        """Start point for add_since"""
+        return time.perf_counter(), sum(self.seconds.values())
+
+    def add_since(self, phase: str, mark: Tuple[float, float]):
+        """Credit phase with the time since mark, minus the phases recorded meanwhile"""
+        started, recorded = mark
+        nested = sum(self.seconds.values()) - recorded
+        self.seconds[phase] += max(0.0, time.perf_counter() - started - nested)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        mark = self.mark()
+        try:
+            yield
+        finally:
+            self.add_since(name, mark)
+
+    def server_seconds(self) -> float:
+        return sum(self.seconds[phase] for phase in SERVER_PHASES)
+
+    def ms(self) -> Dict[str, int]:
+        return {phase: round(seconds * 1000) for phase, seconds in self.seconds.items()}
+
+
+@contextmanager
+def measure() -> Iterator[PhaseTimer]:
+    """Time the phases of every request the current thread makes inside the block"""
+    timer = PhaseTimer()
+    previous = getattr(_local, 'timer', None)
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+def current() -> Optional[PhaseTimer]:
+    """Active timer of this thread, if any"""
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Credit the block to phase on the active timer (no-op without one)"""
+    timer = current()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        # DNS lookup + TCP handshake; the lookup credits itself to 'dns'
+        with phase('connect'):
+            return super()._new_conn()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        with phase('connect'):
+            return super()._new_conn()
+
+    def connect(self):
+        # Everything connect() does beyond _new_conn is the TLS handshake
+        with phase('tls'):
+            super().connect()
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+# For PoolManager.pool_classes_by_scheme
+TIMED_POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class TimingStats:
+    """Per-phase samples over a run, for percentile reports"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+
+    def add(self, timer: PhaseTimer):
+        with self.lock:
+            for phase_name, seconds in timer.seconds.items():
+                self.samples[phase_name].append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples['ttfb'])
+
+    def percentiles(self, pcts=(50, 90, 99)) -> Dict[str, Dict[int, float]]:
+        """phase -> {pct: milliseconds}"""
+        with self.lock:
+            return {phase_name: {pct: percentile(values, pct) * 1000 for pct in pcts}
+                    for phase_name, values in self.samples.items()}
+
+    def summary_lines(self) -> List[str]:
+        return [f"{phase_name:<9} p50 {p[50]:7.0f}  p90 {p[90]:7.0f}  p99 {p[99]:7.0f} ms"
+                for phase_name, p in self.percentiles().items()]
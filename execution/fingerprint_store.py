@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Content Fingerprint Store
+
+Persists, per website URL, a hash of the normalized homepage HTML together
+with the analysis produced for it. analyze_pain_points.py consults it so
+that sites whose content has not changed since the last run reuse their
+stored results instead of being re-parsed and re-crawled.
+
+Usage:
+    from fingerprint_store import FingerprintStore, fingerprint_html
+
+    store = FingerprintStore(Path(".tmp/analysis_cache.sqlite"), rules_version)
+    cached = store.get(url, fingerprint_html(html))
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# Markup that changes on every request without changing the page
+VOLATILE_PATTERNS = [
+    re.compile(r'<!--.*?-->', re.S),                                  # comments (build stamps, cache notes)
+    re.compile(r'\snonce="[^"]*"', re.I),                             # CSP nonces
+    re.compile(r'(<input[^>]+type="hidden"[^>]*value=")[^"]*', re.I),  # CSRF / form tokens
+    re.compile(r'([?&](?:ver|v|_|t|ts|cb)=)[\w.-]+', re.I),           # cache-busting query args
+]
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint_html(html: Union[str, bytes]) -> str:
+    """Hash the HTML after dropping per-request noise and collapsing whitespace"""
+    if isinstance(html, bytes):
+        # Only used for hashing, so exact charset detection is not needed
+        html = html.decode('utf-8', errors='replace')
+    for pattern in VOLATILE_PATTERNS:
+        html = pattern.sub(lambda m: m.group(1) if m.groups() else '', html)
+    html = WHITESPACE.sub(' ', html).strip()
+    return hashlib.sha256(html.encode('utf-8', 'replace')).hexdigest()
+
+
+class FingerprintStore:
+    """SQLite-backed map of url -> (content hash, analysis result)"""
+
+    def __init__(self, path: Path, rules_version: str = ''):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            rules_version: Identifier of the analysis rules; entries stored
+                under a different version are treated as misses
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.rules_version = rules_version
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS analyses (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                analyzed_at TEXT NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def get(self, url: str, content_hash: str) -> Optional[Dict]:
+        """Stored result for url if its content and the rules are unchanged"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT result FROM analyses WHERE url = ? AND content_hash = ? AND rules_version = ?",
+                (url, content_hash, self.rules_version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, url: str, content_hash: str, result: Dict):
+        """Store (or replace) the analysis for url"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                (url, content_hash, self.rules_version,
+                 json.dumps(result, ensure_ascii=False), datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
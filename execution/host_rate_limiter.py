@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Cross-Process Host Rate Limiter
+
+Token bucket per website host, kept in a local SQLite file so that every
+process on the machine draws from the same buckets. Several pipeline runs
+started in parallel (n8n, overlapping queries) therefore stay within one
+request rate per host in total, while unrelated hosts are not slowed down.
+
+Each request reserves a token in a single short transaction; when the
+bucket is empty the reservation is made against future refill and the
+caller sleeps until its slot, outside the transaction. Inside wait_limit()
+a caller with a time budget gives its token back and gets
+RateLimitWaitExceeded instead of sleeping past the budget.
+
+Usage:
+    from host_rate_limiter import HostRateLimiter
+    from http_fetcher import create_session
+
+    limiter = HostRateLimiter(Path(".tmp/host_limits.sqlite"), rate=2, burst=4)
+    session = create_session(limiter=limiter)   # every request acquires first
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+# Default location, shared by every run on this machine
+DEFAULT_LIMITS_PATH = Path(__file__).parent.parent / ".tmp" / "host_limits.sqlite"
+
+# Buckets idle for this long are dropped (they would be full again anyway)
+IDLE_BUCKET_SECONDS = 3600
+
+_local = threading.local()
+
+
+def host_key(url: str) -> str:
+    """Bucket key for url: hostname without 'www.'"""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class RateLimitWaitExceeded(Exception):
+    """Raised by acquire() when the host's slot comes after the wait_limit() budget"""
+
+
+@contextmanager
+def wait_limit(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the rate-limit waits of every request the current thread makes
+    inside the block, redirects included, to seconds from now (None: no bound)
+    """
+    previous = getattr(_local, 'expires_at', None)
+    _local.expires_at = time.monotonic() + seconds if seconds is not None else None
+    try:
+        yield
+    finally:
+        _local.expires_at = previous
+
+
+class HostRateLimiter:
+    """Per-host token bucket shared across processes through SQLite"""
+
+    def __init__(self, path: Path = DEFAULT_LIMITS_PATH, rate: float = 2, burst: float = 4):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            rate: Requests per second allowed per host, across all processes
+            burst: Requests a host may receive back to back after being idle
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.rate = rate
+        self.burst = burst
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.gave_up = 0
+        self.lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("DELETE FROM buckets WHERE updated < ?", (time.time() - IDLE_BUCKET_SECONDS,))
+
+    def reserve(self, url: str) -> float:
+        """
+        Take one token for url's host.
+
+        Returns:
+            Seconds the caller must wait before sending (0 if a token was free)
+        """
+        host = host_key(url)
+        if not host:
+            return 0.0
+        with self.lock:
+            # Wall clock, not monotonic: the timestamps are shared between processes
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+                if row is None:
+                    tokens = self.burst
+                else:
+                    tokens = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                # May go negative: that is a reservation against future refill
+                tokens -= 1
+                self.conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (host, tokens, now))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return max(0.0, -tokens / self.rate)
+
+    def release(self, url: str):
+        """Give back a token reserved for url's host but not used"""
+        host = host_key(url)
+        if not host:
+            return
+        with self.lock:
+            self.conn.execute("UPDATE buckets SET tokens = MIN(tokens + 1, ?) WHERE host = ?", (self.burst, host))
+
+    def acquire(self, url: str):
+        """
+        Block until a request to url's host is allowed.
+
+        Raises:
+            RateLimitWaitExceeded: The slot comes after the thread's wait_limit()
+        """
+        wait = self.reserve(url)
+        expires_at = getattr(_local, 'expires_at', None)
+        if expires_at is not None and time.monotonic() + wait > expires_at:
+            self.release(url)
+            with self.lock:
+                self.gave_up += 1
+            raise RateLimitWaitExceeded(f"Turno de {host_key(url)} en {wait:.1f}s, fuera del presupuesto")
+        if wait > 0:
+            with self.lock:
+                self.waits += 1
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+    def summary(self) -> str:
+        return (f"{self.waits} esperas, {self.waited_seconds:.1f}s en total, "
+                f"{self.gave_up} peticiones abandonadas por falta de presupuesto")
+
+    def close(self):
+        self.conn.close()
+
+
+def add_rate_limit_arguments(parser: argparse.ArgumentParser):
+    """Add --host-rate, --host-burst and --no-host-limit to a script's CLI"""
+    parser.add_argument(
+        '--host-rate',
+        type=float,
+        default=2,
+        help='Requests per second per website host, shared by all concurrent runs (default: 2)'
+    )
+    parser.add_argument(
+        '--host-burst',
+        type=float,
+        default=4,
+        help='Back-to-back requests a host may get after being idle (default: 4)'
+    )
+    parser.add_argument(
+        '--no-host-limit',
+        action='store_true',
+        help='Do not coordinate per-host request rates with other runs'
+    )
+
+
+def rate_limiter_from_args(args: argparse.Namespace) -> Optional[HostRateLimiter]:
+    """HostRateLimiter configured from add_rate_limit_arguments flags (None if disabled)"""
+    if args.no_host_limit:
+        return None
+    return HostRateLimiter(DEFAULT_LIMITS_PATH, rate=args.host_rate, burst=args.host_burst)
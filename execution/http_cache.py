@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Response Cache
+
+Disk-backed (SQLite) cache of website responses, shared by every stage that
+fetches websites: analyze_pain_points.py and the email/social extractor in
+scrape_gmb_enhanced.py. Entries are keyed by final
+URL (the requested URL is stored as an alias) and are served without any
+request while younger than the TTL. Older entries are revalidated with
+If-None-Match / If-Modified-Since, so an unchanged site costs a 304.
+
+Usage:
+    from http_cache import HttpCache
+
+    cache = HttpCache(Path(".tmp/http_cache.sqlite"), ttl_hours=24)
+    response = cache.get(session, url, timeout=10)
+    response.from_cache  # True when no full download happened
+
+Scripts expose the same flags through add_http_cache_arguments(parser) and
+build the cache with http_cache_from_args(args).
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Default location, next to the other run artifacts
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".tmp" / "http_cache.sqlite"
+
+# Per-hop headers that must not be replayed from the cache
+SKIPPED_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding',
+                   'content-length', 'set-cookie'}
+
+
+class HttpCache:
+    """SQLite-backed cache of GET responses with TTL and conditional revalidation"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl_hours: float = 24):
+        """
+        Args:
+            path: SQLite file (created if missing); several processes may share it
+            ttl_hours: Age under which entries are served without any request
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_hours * 3600
+        self.hits = 0           # served from disk, no request
+        self.revalidated = 0    # 304 Not Modified
+        self.misses = 0         # full download
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        # WAL lets the pipeline stages read while another process writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                final_url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                elapsed REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS aliases (
+                url TEXT PRIMARY KEY,
+                final_url TEXT NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Stored entry for url (requested or final URL), fresh or not"""
+        with self.lock:
+            row = self.conn.execute(
+                """SELECT r.final_url, r.status, r.headers, r.content, r.etag, r.last_modified,
+                          r.elapsed, r.fetched_at
+                   FROM responses r LEFT JOIN aliases a ON a.final_url = r.final_url
+                   WHERE r.final_url = ? OR a.url = ? LIMIT 1""",
+                (url, url)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ['final_url', 'status', 'headers', 'content', 'etag', 'last_modified', 'elapsed', 'fetched_at']
+        entry = dict(zip(keys, row))
+        entry['headers'] = json.loads(entry['headers'])
+        entry['content'] = zlib.decompress(entry['content'])
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Validators to send when revalidating entry"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response: requests.Response, elapsed: Optional[float] = None):
+        """
+        Store a successful response (its body must already be read).
+
+        Args:
+            url: URL originally requested (kept as an alias of the final URL)
+            response: 200 response
+            elapsed: Seconds the full download took (default: response.elapsed)
+        """
+        if response.status_code != 200:
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS}
+        if elapsed is None:
+            elapsed = response.elapsed.total_seconds()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (response.url, response.status_code, json.dumps(headers),
+                 zlib.compress(response.content, 1), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), elapsed, time.time())
+            )
+            if url != response.url:
+                self.conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?)", (url, response.url))
+            self.conn.commit()
+
+    def touch(self, entry: Dict):
+        """Mark entry as just revalidated (304)"""
+        with self.lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE final_url = ?",
+                              (time.time(), entry['final_url']))
+            self.conn.commit()
+
+    @staticmethod
+    def to_response(entry: Dict) -> requests.Response:
+        """
+        Rebuild a requests.Response from entry. `elapsed` is the original
+        download time, so load-time checks keep working on cached pages.
+        """
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['content']
+        response.url = entry['final_url']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(seconds=entry['elapsed'])
+        response.from_cache = True
+        return response
+
+    def get(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        Cached replacement for session.get(url, **kwargs).
+
+        Fresh entries are returned without a request; stale ones are
+        revalidated and reused on 304. The returned response carries
+        `from_cache` (True when no body was downloaded).
+        """
+        entry = self.lookup(url)
+        if entry is not None and self.is_fresh(entry):
+            with self.lock:
+                self.hits += 1
+            return self.to_response(entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update(self.conditional_headers(entry))
+        response = session.get(url, headers=headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            response.close()
+            self.touch(entry)
+            with self.lock:
+                self.revalidated += 1
+            return self.to_response(entry)
+
+        with self.lock:
+            self.misses += 1
+        response.from_cache = False
+        if not kwargs.get('stream'):
+            self.store(url, response)
+        return response
+
+    def summary(self) -> str:
+        return f"{self.hits} sin petición, {self.revalidated} revalidadas (304), {self.misses} descargadas"
+
+    def close(self):
+        self.conn.close()
+
+
+def add_http_cache_arguments(parser: argparse.ArgumentParser):
+    """Add --http-cache, --http-cache-ttl and --no-http-cache to a script's CLI"""
+    parser.add_argument(
+        '--http-cache',
+        type=str,
+        default=str(DEFAULT_CACHE_PATH),
+        help='Response cache shared by the pipeline stages (default: .tmp/http_cache.sqlite)'
+    )
+    parser.add_argument(
+        '--http-cache-ttl',
+        type=float,
+        default=24,
+        help='Hours a cached page is used without asking the site again (default: 24)'
+    )
+    parser.add_argument(
+        '--no-http-cache',
+        action='store_true',
+        help='Always download pages, bypassing the response cache'
+    )
+
+
+def http_cache_from_args(args: argparse.Namespace) -> Optional[HttpCache]:
+    """HttpCache configured from add_http_cache_arguments flags (None if disabled)"""
+    if args.no_http_cache:
+        return None
+    return HttpCache(Path(args.http_cache), ttl_hours=args.http_cache_ttl)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Fetcher
+
+One place to build the requests.Session used by every execution script, for
+website fetches and API calls alike:
+
+- keep-alive connection pools sized for the caller's concurrency
+- an in-process DNS cache (resolved hosts are reused for DNS_CACHE_TTL)
+- split (connect, read) timeouts, so a dead host fails fast while a slow
+  page still gets its full read budget
+- compressed transfer (gzip/deflate, plus brotli when installed)
+- optionally, a HostRateLimiter and a DeadHostCache consulted before every
+  request, and an AdaptiveConcurrency slot held during it (website stages
+  only; API clients use none of them)
+- per-phase timing (queue, DNS, connect, TLS, time to first byte) for
+  requests made inside fetch_timing.measure()
+
+Usage:
+    from http_fetcher import create_session, split_timeout
+
+    session = create_session(pool_size=16)
+    response = session.get(url, timeout=split_timeout(10))
+"""
+
+import socket
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from adaptive_concurrency import AdaptiveConcurrency, is_overload_response
+from dead_hosts import DeadHostCache
+from fetch_timing import TIMED_POOL_CLASSES, current as current_timer, phase
+from host_rate_limiter import HostRateLimiter
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# Connecting never needs more than this; the rest of the budget is for reading
+CONNECT_TIMEOUT = 5
+
+# Seconds a resolved (or failed) lookup is reused
+DNS_CACHE_TTL = 300
+DNS_NEGATIVE_TTL = 60
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br when it is importable)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class DnsCache:
+    """Caching wrapper around socket.getaddrinfo, installed process-wide"""
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL, negative_ttl: float = DNS_NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._entries: Dict[tuple, tuple] = {}  # key -> (expires_at, result or gaierror)
+        self._resolve = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        with phase('dns'):
+            return self._getaddrinfo(host, port, family, type, proto, flags)
+
+    def _getaddrinfo(self, host, port, family, type, proto, flags):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                cached = entry[1]
+            else:
+                self.misses += 1
+                cached = None
+        if cached is not None:
+            if isinstance(cached, socket.gaierror):
+                raise cached
+            return cached
+
+        try:
+            result = self._resolve(host, port, family, type, proto, flags)
+        except socket.gaierror as e:
+            # Dead domains fail again and again within a run: remember briefly
+            with self.lock:
+                self._entries[key] = (now + self.negative_ttl, e)
+            raise
+        with self.lock:
+            self._entries[key] = (now + self.ttl, result)
+        return result
+
+    def install(self):
+        socket.getaddrinfo = self.getaddrinfo
+
+
+_dns_cache = None
+_dns_lock = threading.Lock()
+
+
+def enable_dns_cache() -> DnsCache:
+    """Install the process-wide DNS cache (once) and return it"""
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is None:
+            _dns_cache = DnsCache()
+            _dns_cache.install()
+    return _dns_cache
+
+
+def split_timeout(total: float) -> Tuple[float, float]:
+    """(connect, read) timeout for a request allowed `total` seconds"""
+    return (min(CONNECT_TIMEOUT, total), total)
+
+
+class TimedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report connect/TLS time and whose sends
+    report time to first byte to the thread's fetch_timing timer.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(TIMED_POOL_CLASSES)
+
+    def send(self, request, **kwargs):
+        # Returns once the headers are in (bodies are streamed or read later)
+        with phase('ttfb'):
+            return super().send(request, **kwargs)
+
+
+class GuardedAdapter(TimedAdapter):
+    """
+    HTTPAdapter that, before each send (redirects included), fails fast for
+    hosts known to be dead, waits for the host's rate-limit token and then
+    for a concurrency slot. Connection failures are recorded in the dead
+    host cache; timeouts and overload statuses feed the concurrency controller.
+    """
+
+    def __init__(self, limiter: Optional[HostRateLimiter] = None,
+                 dead_hosts: Optional[DeadHostCache] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, **kwargs):
+        self.limiter = limiter
+        self.dead_hosts = dead_hosts
+        self.concurrency = concurrency
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        timer = current_timer()
+        queued = timer.mark() if timer is not None else None
+        record = self.dead_hosts.check(request.url) if self.dead_hosts is not None else None
+        if self.limiter is not None:
+            self.limiter.acquire(request.url)
+        try:
+            if self.concurrency is not None:
+                with self.concurrency.slot() as slot:
+                    if timer is not None:
+                        timer.add_since('queue', queued)
+                    response = super().send(request, **kwargs)
+                    slot.failed = is_overload_response(response)
+            else:
+                if timer is not None:
+                    timer.add_since('queue', queued)
+                response = super().send(request, **kwargs)
+        except requests.ConnectionError as e:
+            if self.dead_hosts is not None:
+                self.dead_hosts.record_failure(request.url, e)
+            raise
+        if record is not None:
+            self.dead_hosts.clear(request.url)
+        return response
+
+
+def create_session(pool_size: int = 10, host_pools: int = 100,
+                   limiter: Optional[HostRateLimiter] = None,
+                   dead_hosts: Optional[DeadHostCache] = None,
+                   concurrency: Optional[AdaptiveConcurrency] = None) -> requests.Session:
+    """
+    Build a session with keep-alive pools, compression and the DNS cache on.
+
+    Args:
+        pool_size: Connections kept per host (match the caller's concurrency)
+        host_pools: Distinct hosts whose pools are kept alive
+        limiter: Per-host rate limiter shared with other processes
+        dead_hosts: Negative cache of hosts that recently failed to connect
+        concurrency: Adaptive limit on requests in flight across all hosts
+    """
+    enable_dns_cache()
+    session = requests.Session()
+    if limiter is not None or dead_hosts is not None or concurrency is not None:
+        adapter = GuardedAdapter(limiter, dead_hosts, concurrency,
+                                 pool_connections=host_pools, pool_maxsize=pool_size)
+    else:
+        adapter = TimedAdapter(pool_connections=host_pools, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,
+    })
+    return session
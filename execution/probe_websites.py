@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Website Liveness Probe
+
+Fast pipeline stage run before the heavy website work. Every lead's website
+gets a TCP connect plus a HEAD request (following redirects), many at once,
+and the lead is annotated with:
+
+- site_reachable: True if the site answered HTTP at all, False if not
+- site_final_url: canonical URL after redirects
+- site_status: HTTP status of the final response
+- site_tls: 'valid', 'invalid' (answered only without certificate checks) or 'none' (plain HTTP)
+- site_probe_error: why the site is unreachable
+
+analyze_pain_points.py and capture_screenshots.py skip unreachable sites and
+use site_final_url instead of discovering dead sites at full timeout cost.
+
+Usage:
+    python probe_websites.py --input .tmp/leads_clean.json --output .tmp/leads_probed.json
+"""
+
+import argparse
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+
+from dead_hosts import DeadHostCache, DeadHostError, add_dead_host_arguments, dead_host_cache_from_args
+from deduplicate_leads import load_file, save_file
+from host_rate_limiter import add_rate_limit_arguments, rate_limiter_from_args
+from http_fetcher import create_session, split_timeout
+
+PROBE_FIELDS = ['site_reachable', 'site_final_url', 'site_status', 'site_tls', 'site_probe_error']
+
+
+def is_unreachable(lead: Dict) -> bool:
+    """True only if the probe ran and found no HTTP answer (CSV round-trips give strings)"""
+    return str(lead.get('site_reachable', '')).lower() == 'false'
+
+
+def canonical_url(lead: Dict) -> str:
+    """Probed final URL when known, else the lead's website"""
+    final_url = lead.get('site_final_url')
+    if final_url and final_url != 'N/A':
+        return final_url
+    return lead.get('website', 'N/A')
+
+
+def probe_site(url: str, session: requests.Session, timeout: float,
+               dead_hosts: Optional[DeadHostCache] = None) -> Dict:
+    """
+    Probe one website.
+
+    Returns:
+        Dictionary with the PROBE_FIELDS
+    """
+    result = {field: 'N/A' for field in PROBE_FIELDS}
+    if not url or url == 'N/A':
+        return result
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    result['site_reachable'] = False
+
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    try:
+        if dead_hosts is not None:
+            dead_hosts.check(url)
+        # 1. TCP connect: DNS failures and refusals show up here in milliseconds
+        try:
+            socket.create_connection((parsed.hostname, port), timeout=split_timeout(timeout)[0]).close()
+        except socket.timeout as e:
+            raise requests.exceptions.ConnectTimeout(f"TCP connect timeout: {e}")
+        except OSError as e:
+            raise requests.ConnectionError(f"TCP connect failed: {e}")
+
+        # 2. HEAD, following redirects (GET when HEAD is not supported)
+        try:
+            response = _head(session, url, timeout, verify=True)
+            result['site_tls'] = 'valid' if response.url.startswith('https://') else 'none'
+        except requests.exceptions.SSLError:
+            response = _head(session, url, timeout, verify=False)
+            result['site_tls'] = 'invalid' if response.url.startswith('https://') else 'none'
+    except DeadHostError as e:
+        result['site_probe_error'] = str(e)[:120]
+        return result
+    except requests.RequestException as e:
+        if dead_hosts is not None and isinstance(e, requests.ConnectionError):
+            dead_hosts.record_failure(url, e)
+        result['site_probe_error'] = str(e)[:120]
+        return result
+
+    result['site_reachable'] = True
+    result['site_final_url'] = response.url
+    result['site_status'] = response.status_code
+    return result
+
+
+def _head(session: requests.Session, url: str, timeout: float, verify: bool) -> requests.Response:
+    response = session.head(url, timeout=split_timeout(timeout), allow_redirects=True, verify=verify)
+    if response.status_code in (405, 501):
+        response = session.get(url, timeout=split_timeout(timeout), allow_redirects=True,
+                               verify=verify, stream=True)
+        response.close()
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check which lead websites are alive before analysis")
+    parser.add_argument('--input', required=True, help="Input file (JSON/CSV)")
+    parser.add_argument('--output', required=True, help="Output file (JSON/CSV)")
+    parser.add_argument('--workers', type=int, default=64, help="Concurrent probes (default: 64)")
+    parser.add_argument('--timeout', type=float, default=5, help="Seconds per probe request (default: 5)")
+    add_rate_limit_arguments(parser)
+    add_dead_host_arguments(parser)
+
+    args = parser.parse_args()
+
+    # The probe's retry without certificate checks is deliberate
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+
+    if not input_path.exists():
+        print(f"❌ Input file not found: {input_path}")
+        sys.exit(1)
+
+    leads = load_file(input_path)
+    if not leads:
+        print("❌ No leads found in input file.")
+        sys.exit(1)
+
+    limiter = rate_limiter_from_args(args)
+    dead_hosts = dead_host_cache_from_args(args)
+    session = create_session(pool_size=2, host_pools=args.workers * 2, limiter=limiter)
+
+    # Leads sharing a website are probed once
+    urls = list(dict.fromkeys(lead.get('website', 'N/A') for lead in leads))
+    print(f"📡 Probing {len(urls)} websites ({len(leads)} leads, {args.workers} workers)...")
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        probes = dict(zip(urls, executor.map(
+            lambda url: probe_site(url, session, args.timeout, dead_hosts), urls
+        )))
+    elapsed = time.time() - started
+
+    for lead in leads:
+        lead.update(probes[lead.get('website', 'N/A')])
+    save_file(leads, output_path)
+
+    # Summary
+    probed = [p for p in probes.values() if p['site_reachable'] != 'N/A']
+    reachable = sum(1 for p in probed if p['site_reachable'])
+    redirected = sum(1 for url, p in probes.items() if p['site_reachable'] is True and p['site_final_url'].rstrip('/') != url.rstrip('/'))
+    tls_invalid = sum(1 for p in probed if p['site_tls'] == 'invalid')
+
+    print("\n" + "=" * 40)
+    print("LIVENESS PROBE SUMMARY")
+    print("=" * 40)
+    print(f"✓ Reachable: {reachable}/{len(probed)}")
+    print(f"❌ Unreachable: {len(probed) - reachable}")
+    print(f"↪️  Redirected: {redirected}")
+    print(f"🔓 Invalid TLS: {tls_invalid}")
+    print(f"⏱️  {elapsed:.1f}s ({len(probed) / elapsed if elapsed else 0:.0f} sites/s)")
+    if dead_hosts is not None:
+        print(f"🪦 Dead hosts: {dead_hosts.summary()}")
+        dead_hosts.close()
+    if limiter is not None:
+        limiter.close()
+    print("=" * 40 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Headless Render Pool
+
+A few headless Chrome instances shared by all of the analyzer's fetch
+threads, for the pages whose static HTML is too thin to analyze (React/Vue
+shells with an empty <div id="root">). Browsers start lazily, are reused
+across pages and are only ever asked for the rendered DOM, so the cost is
+paid once per thin page instead of once per lead.
+
+Selenium is optional: without it (or without a working Chrome) the pool
+reports itself unavailable and the analyzer keeps the static result.
+
+Page loads are polite like every other fetch: hosts the dead-host cache
+blocks are skipped, and each load waits for the host's rate-limit token,
+never longer than the render's own timeout (the lead's remaining budget).
+
+Usage:
+    from render_pool import RenderPool
+
+    pool = RenderPool(size=2, limiter=limiter, dead_hosts=dead_hosts)
+    html = pool.render("https://example.com", timeout=15)   # None on failure
+    pool.close()
+"""
+
+import argparse
+import queue
+import threading
+import time
+from typing import Optional
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+from dead_hosts import DeadHostCache, DeadHostError
+from host_rate_limiter import HostRateLimiter, RateLimitWaitExceeded, wait_limit
+from http_fetcher import USER_AGENT
+
+# After the load event, wait up to this long for client-side rendering to fill the body
+SETTLE_SECONDS = 3
+# Visible characters that mean the app has rendered
+RENDERED_TEXT_CHARS = 200
+
+
+class RenderPool:
+    """Bounded set of reusable headless Chrome drivers"""
+
+    def __init__(self, size: int = 2, limiter: Optional[HostRateLimiter] = None,
+                 dead_hosts: Optional[DeadHostCache] = None):
+        """
+        Args:
+            size: Browsers kept open at most (each costs a few hundred MB)
+            limiter: Per-host rate limiter shared with the other fetches
+            dead_hosts: Negative cache of hosts that recently failed to connect
+        """
+        self.size = size
+        self.limiter = limiter
+        self.dead_hosts = dead_hosts
+        self.renders = 0
+        self.failures = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+        self._idle: "queue.Queue" = queue.Queue()
+        self._started = 0
+        self._broken = not SELENIUM_AVAILABLE
+
+    @property
+    def available(self) -> bool:
+        return not self._broken
+
+    def _new_driver(self):
+        chrome_options = Options()
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1280,800")
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
+        # The DOM is all we read: skip images
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        service = Service(ChromeDriverManager().install())
+        return webdriver.Chrome(service=service, options=chrome_options)
+
+    def _borrow(self, timeout: float):
+        """An idle driver, a new one while under `size`, or wait for one"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            start_new = self._started < self.size
+            if start_new:
+                self._started += 1
+        if not start_new:
+            return self._idle.get(timeout=timeout)
+        try:
+            return self._new_driver()
+        except Exception as e:
+            with self.lock:
+                self._started -= 1
+                # No Chrome/driver on this machine: stop trying for the rest of the run
+                self._broken = True
+            print(f"      ⚠️  Navegador headless no disponible: {str(e)[:60]}")
+            raise
+
+    def render(self, url: str, timeout: float = 15) -> Optional[str]:
+        """
+        Rendered HTML of url after client-side scripts ran.
+
+        Returns:
+            page source, or None if the browser failed or timed out
+        """
+        if self._broken or timeout <= 0:
+            return None
+        started = time.time()
+        try:
+            driver = self._borrow(timeout)
+        except Exception:
+            with self.lock:
+                self.failures += 1
+            return None
+
+        # Skip known-dead hosts, then wait for the host's token within what
+        # is left of the timeout
+        try:
+            if self.dead_hosts is not None:
+                self.dead_hosts.check(url)
+            if self.limiter is not None:
+                with wait_limit(started + timeout - time.time()):
+                    self.limiter.acquire(url)
+        except (DeadHostError, RateLimitWaitExceeded):
+            self._idle.put(driver)
+            with self.lock:
+                self.skipped += 1
+            return None
+
+        try:
+            driver.set_page_load_timeout(max(1, started + timeout - time.time()))
+            driver.get(url)
+            settle_until = time.time() + min(SETTLE_SECONDS, max(0, started + timeout - time.time()))
+            while time.time() < settle_until:
+                text = driver.execute_script("return document.body ? document.body.innerText.length : 0")
+                if text >= RENDERED_TEXT_CHARS:
+                    break
+                time.sleep(0.25)
+            html = driver.page_source
+        except Exception:
+            # A wedged browser is dropped, not reused
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self.lock:
+                self._started -= 1
+                self.failures += 1
+            return None
+
+        self._idle.put(driver)
+        with self.lock:
+            self.renders += 1
+            self.seconds += time.time() - started
+        return html
+
+    def summary(self) -> str:
+        return (f"{self.renders} páginas renderizadas ({self.seconds:.1f}s), {self.failures} fallos, "
+                f"{self.skipped} omitidas (host caído o sin turno a tiempo)")
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def add_render_arguments(parser: argparse.ArgumentParser):
+    """Add --render-workers to a script's CLI"""
+    parser.add_argument(
+        '--render-workers',
+        type=int,
+        default=2,
+        help='Headless browsers for pages whose static HTML is too thin (JS apps), 0 = never render (default: 2)'
+    )
+
+
+def render_pool_from_args(args: argparse.Namespace, limiter: Optional[HostRateLimiter] = None,
+                          dead_hosts: Optional[DeadHostCache] = None) -> Optional[RenderPool]:
+    """RenderPool from --render-workers (None if disabled or Selenium is missing)"""
+    if args.render_workers <= 0:
+        return None
+    if not SELENIUM_AVAILABLE:
+        print("ℹ️  Selenium no instalado: las páginas JS se analizan solo con el HTML estático")
+        return None
+    return RenderPool(size=args.render_workers, limiter=limiter, dead_hosts=dead_hosts)
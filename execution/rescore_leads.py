@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Lead Re-scoring
+
+Re-applies the pain-point rules and the opportunity score of
+analyze_pain_points.py to already analyzed leads, from the raw signals the
+analyzer stored (signal_store.py). No website is fetched, so after changing
+a threshold (WebsiteAnalyzer.SLOW_LOAD_SECONDS, MAX_DESIGN_POINTS...) or the
+pain-point texts, the whole lead base is re-scored in milliseconds instead
+of re-crawled.
+
+Leads with no stored signals (no website, unreachable, timeouts) keep their
+current values, and so do leads whose last analysis failed (fetch_status
+other than ok/recovered: the stored signals are from an older run) and
+leads whose signals come from a partial analysis (budget ran out).
+
+Usage:
+    python rescore_leads.py --input .tmp/leads_analyzed_20250101_120000.json
+    python rescore_leads.py --input .tmp/leads_analyzed.jsonl --output .tmp/leads_rescored.jsonl
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+# fetch_status of leads whose analysis in the input file reached the site
+RESCORABLE_STATUSES = ('ok', 'recovered')
+
+from analyze_pain_points import JsonlWriter, WebsiteAnalyzer, iter_leads, save_results
+from deduplicate_leads import normalize_site
+from probe_websites import canonical_url
+from signal_store import DEFAULT_SIGNALS_PATH, SignalStore
+
+
+def rescore_lead(lead: Dict, signals: Dict[str, Dict]) -> str:
+    """
+    Re-score lead in place from its website's signals.
+
+    Returns:
+        'rescored', or why the lead was left unchanged: 'failed' (its
+        analysis did not reach the site), 'partial' (signals from a partial
+        analysis) or 'missing' (no signals stored for its website)
+    """
+    if lead.get('fetch_status', 'ok') not in RESCORABLE_STATUSES:
+        return 'failed'
+    stored = signals.get(normalize_site(canonical_url(lead)))
+    if stored is None:
+        return 'missing'
+    if stored['partial']:
+        return 'partial'
+    scored = WebsiteAnalyzer.score_signals(stored['design_issues'], stored['automation_gaps'],
+                                           stored['load_time'])
+    del scored['design_issues']
+    lead.update(scored)
+    return 'rescored'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score analyzed leads from stored signals, without fetching any website"
+    )
+    parser.add_argument('--input', '-i', required=True,
+                        help='Analyzed leads file from analyze_pain_points.py (JSON, JSONL or CSV)')
+    parser.add_argument('--output', '-o', default=None,
+                        help='Output file, same format as the input (default: .tmp/leads_rescored_<timestamp>.<ext>)')
+    parser.add_argument('--signals-path', default=None,
+                        help='Signal store written by the analyzer (default: .tmp/signals.sqlite)')
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    signals_path = Path(args.signals_path) if args.signals_path else DEFAULT_SIGNALS_PATH
+    if not input_path.exists():
+        print(f"❌ Error: Archivo no encontrado: {input_path}")
+        sys.exit(1)
+    if not signals_path.exists():
+        print(f"❌ Error: No hay señales guardadas en {signals_path} (ejecuta antes analyze_pain_points.py)")
+        sys.exit(1)
+
+    output_format = input_path.suffix.lower().lstrip('.')
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        output_path = signals_path.parent / f"leads_rescored_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{output_format}"
+
+    started = time.time()
+    store = SignalStore(signals_path)
+    signals = store.load_all()
+    store.close()
+
+    total = rescored = pain_changed = score_changed = 0
+    skipped = {'missing': 0, 'failed': 0, 'partial': 0}
+    writer = JsonlWriter(output_path) if output_format == 'jsonl' else None
+    leads = []
+    for lead in iter_leads(input_path):
+        total += 1
+        before = (lead.get('pain_point'), str(lead.get('opportunity_score')))
+        outcome = rescore_lead(lead, signals)
+        if outcome != 'rescored':
+            skipped[outcome] += 1
+        else:
+            rescored += 1
+            pain_changed += lead['pain_point'] != before[0]
+            score_changed += str(lead['opportunity_score']) != before[1]
+        if writer is not None:
+            writer.write(lead)
+        else:
+            leads.append(lead)
+    elapsed = time.time() - started
+
+    if total == 0:
+        print("❌ Error: No se encontraron leads en el archivo")
+        sys.exit(1)
+
+    if writer is not None:
+        writer.close()
+        print(f"\n✓ Resultados guardados en: {output_path}")
+    else:
+        leads.sort(key=lambda x: int(x.get('opportunity_score') or 0), reverse=True)
+        save_results(leads, output_path, output_format)
+
+    print(f"♻️  Re-puntuados {rescored}/{total} leads desde {len(signals)} webs con señales "
+          f"en {elapsed * 1000:.0f} ms")
+    print(f"   Punto de dolor cambiado: {pain_changed}, score cambiado: {score_changed}, "
+          f"sin señales utilizables (sin cambios): {total - rescored}")
+    print(f"   De ellos: sin señales {skipped['missing']}, análisis fallido {skipped['failed']}, "
+          f"señales parciales {skipped['partial']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
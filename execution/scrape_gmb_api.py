@@ -19,6 +19,8 @@ from typing import List, Dict, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
+from http_fetcher import create_session, split_timeout
+
 # Load environment variables from project root
 project_root = Path(__file__).parent.parent
 env_path = project_root / ".env"
@@ -33,6 +35,7 @@ except (PermissionError, OSError) as e:
 # Configuration - will use .env if loaded, otherwise system env vars
 API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 BASE_URL = "https://places.googleapis.com/v1/places:searchText"
+API_TIMEOUT = 30  # seconds per page request
 
 def validate_api_key():
     """Ensure API key is present"""
@@ -64,6 +67,8 @@ def search_places(query: str, max_results: int = 20) -> List[Dict]:
     
     all_leads = []
     next_page_token = None
+    # Pages reuse one keep-alive connection instead of a new TLS handshake each
+    session = create_session(pool_size=1)
     
     while len(all_leads) < max_results:
         # Update payload for pagination
@@ -73,7 +78,8 @@ def search_places(query: str, max_results: int = 20) -> List[Dict]:
             time.sleep(2) 
             
         try:
-            response = requests.post(BASE_URL, json=payload, headers=headers)
+            response = session.post(BASE_URL, json=payload, headers=headers,
+                                    timeout=split_timeout(API_TIMEOUT))
             response.raise_for_status()
             data = response.json()
             
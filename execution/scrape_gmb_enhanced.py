@@ -14,10 +14,12 @@ import argparse
 import json
 import csv
 import sys
+import threading
 import time
 import re
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Set
 from urllib.parse import quote_plus, urljoin, urlparse
 
@@ -39,6 +41,14 @@ except ImportError:
 
 from dotenv import load_dotenv
 
+from http_cache import HttpCache, add_http_cache_arguments, http_cache_from_args
+from http_fetcher import create_session, split_timeout
+from host_rate_limiter import HostRateLimiter, add_rate_limit_arguments, rate_limiter_from_args
+from dead_hosts import DeadHostCache, add_dead_host_arguments, dead_host_cache_from_args
+from adaptive_concurrency import AdaptiveConcurrency, add_concurrency_arguments, concurrency_from_args
+from charset_sniffing import CharsetStats, decode_response
+from deduplicate_leads import normalize_site
+
 load_dotenv()
 
 
@@ -59,12 +69,31 @@ class EmailSocialExtractor:
         'twitter': re.compile(r'(?:https?://)?(?:www\.)?(?:twitter|x)\.com/[\w\-\.]+', re.I),
     }
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, http_cache: Optional[HttpCache] = None,
+                 limiter: Optional[HostRateLimiter] = None, dead_hosts: Optional[DeadHostCache] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None):
+        """
+        Args:
+            timeout: Request timeout in seconds
+            http_cache: Response cache shared with the other pipeline stages;
+                None always downloads
+            limiter: Per-host rate limiter shared with concurrent runs
+            dead_hosts: Negative cache of hosts that recently failed to connect
+            concurrency: Adaptive limit on requests in flight; None crawls
+                one website at a time
+        """
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.http_cache = http_cache
+        self.concurrency = concurrency
+        self.session = create_session(pool_size=concurrency.maximum if concurrency else 10,
+                                      limiter=limiter, dead_hosts=dead_hosts, concurrency=concurrency)
+        # Results by normalized site (domain plus path): listings sharing a
+        # website are crawled once, pages on a shared host are not
+        self._by_domain: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.charset_stats = CharsetStats()
+        self.domains_crawled = 0
+        self.domains_reused = 0
     
     def extract_from_website(self, url: str) -> Dict[str, any]:
         """
@@ -76,6 +105,40 @@ class EmailSocialExtractor:
         Returns:
             Dictionary with email and social media links
         """
+        domain = normalize_site(url)
+        with self.lock:
+            known = self._by_domain.get(domain)
+            if known is not None:
+                self.domains_reused += 1
+                return dict(known)
+        result = self._extract(url)
+        if domain:
+            with self.lock:
+                self.domains_crawled += 1
+                self._by_domain[domain] = dict(result)
+        return result
+    
+    def extract_all(self, urls: List[str]) -> List[Dict[str, any]]:
+        """
+        extract_from_website for many URLs, each distinct site crawled once.
+        With a concurrency controller the crawls run in parallel under it.
+        """
+        keys = [normalize_site(url) or url for url in urls]
+        unique = dict(zip(keys, urls))
+        workers = self.concurrency.maximum if self.concurrency is not None else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            crawled = dict(zip(unique, pool.map(self.extract_from_website, unique.values())))
+        with self.lock:
+            self.domains_reused += len(urls) - len(unique)
+        return [dict(crawled[key]) for key in keys]
+    
+    def summary(self) -> str:
+        line = f"{self.domains_crawled} sites crawled, {self.domains_reused} listings reused a shared site"
+        if self.concurrency is not None:
+            line += f"; adaptive concurrency: {self.concurrency.summary()}"
+        return f"{line}; charset decided by: {self.charset_stats.summary()}"
+    
+    def _extract(self, url: str) -> Dict[str, any]:
         result = {
             'email': None,
             'facebook': None,
@@ -93,12 +156,16 @@ class EmailSocialExtractor:
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # Fetch the webpage
-            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
+            # Fetch the webpage (from the shared cache when possible)
+            if self.http_cache is not None:
+                response = self.http_cache.get(self.session, url, timeout=split_timeout(self.timeout),
+                                               allow_redirects=True)
+            else:
+                response = self.session.get(url, timeout=split_timeout(self.timeout), allow_redirects=True)
             response.raise_for_status()
             
             # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(decode_response(response, self.charset_stats), 'html.parser')
             
             # Get all text and links
             page_text = soup.get_text()
@@ -195,19 +262,29 @@ class LeadScorer:
 class GMBScraperEnhanced:
     """Enhanced Google My Business profile scraper with email and social media extraction"""
     
-    def __init__(self, headless: bool = True, scrape_websites: bool = True):
+    def __init__(self, headless: bool = True, scrape_websites: bool = True,
+                 http_cache: Optional[HttpCache] = None, limiter: Optional[HostRateLimiter] = None,
+                 dead_hosts: Optional[DeadHostCache] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None):
         """
         Initialize the enhanced scraper.
         
         Args:
             headless: Run browser in headless mode
             scrape_websites: Whether to scrape individual websites for emails/social
+            http_cache: Response cache for the website scraping step
+            limiter: Per-host rate limiter for the website scraping step
+            dead_hosts: Negative cache of dead hosts for the website scraping step
+            concurrency: Adaptive controller; websites are then crawled in
+                parallel once all listings are read
         """
         self.driver = None
         self.headless = headless
         self.scrape_websites = scrape_websites
         self.results = []
-        self.email_extractor = EmailSocialExtractor() if scrape_websites else None
+        self.email_extractor = EmailSocialExtractor(
+            http_cache=http_cache, limiter=limiter, dead_hosts=dead_hosts, concurrency=concurrency
+        ) if scrape_websites else None
         self.scorer = LeadScorer()
         
     def setup_driver(self):
@@ -277,6 +354,9 @@ class GMBScraperEnhanced:
             
             print(f"📊 Found {len(listings)} listings, processing up to {max_results}...")
             
+            # With adaptive concurrency, websites are crawled together after the listings
+            deferred = []
+            
             for idx, listing in enumerate(listings[:max_results], 1):
                 try:
                     print(f"  [{idx}/{min(len(listings), max_results)}] Extracting GMB data...", end=" ")
@@ -290,7 +370,11 @@ class GMBScraperEnhanced:
                         business_data['lead_number'] = idx
                         
                         # Extract email and social media if enabled
-                        if self.scrape_websites and business_data.get('website') != 'N/A':
+                        if (self.scrape_websites and business_data.get('website') != 'N/A'
+                                and self.email_extractor.concurrency is not None):
+                            print("✓ (website queued)")
+                            deferred.append(business_data)
+                        elif self.scrape_websites and business_data.get('website') != 'N/A':
                             print("✓")
                             print(f"      🌐 Scraping website for email/social...", end=" ")
                             enhanced_data = self.email_extractor.extract_from_website(
@@ -310,12 +394,6 @@ class GMBScraperEnhanced:
                                 'twitter': 'N/A',
                             })
                         
-                        # Calculate lead score
-                        business_data['lead_score'] = self.scorer.calculate_score(business_data)
-                        business_data['score_label'] = self.scorer.get_score_label(
-                            business_data['lead_score']
-                        )
-                        
                         self.results.append(business_data)
                     else:
                         print("✗ (no data)")
@@ -326,6 +404,19 @@ class GMBScraperEnhanced:
                     print(f"✗ Error: {str(e)[:50]}")
                     continue
             
+            if deferred:
+                print(f"\n🌐 Scraping {len(deferred)} websites for email/social (adaptive concurrency)...")
+                extracted = self.email_extractor.extract_all([data['website'] for data in deferred])
+                for business_data, enhanced_data in zip(deferred, extracted):
+                    business_data.update(enhanced_data)
+            
+            # Calculate lead scores
+            for business_data in self.results:
+                business_data['lead_score'] = self.scorer.calculate_score(business_data)
+                business_data['score_label'] = self.scorer.get_score_label(
+                    business_data['lead_score']
+                )
+            
             print(f"\n✓ Successfully extracted {len(self.results)} business profiles")
             
             # Sort by lead score (highest first)
@@ -579,6 +670,11 @@ Examples:
         help='Skip website scraping for emails and social media (faster but less data)'
     )
     
+    add_http_cache_arguments(parser)
+    add_rate_limit_arguments(parser)
+    add_dead_host_arguments(parser)
+    add_concurrency_arguments(parser)
+    
     args = parser.parse_args()
     
     # Setup output path
@@ -603,9 +699,17 @@ Examples:
     print("=" * 80 + "\n")
     
     # Initialize scraper
+    http_cache = None if args.no_website_scraping else http_cache_from_args(args)
+    limiter = None if args.no_website_scraping else rate_limiter_from_args(args)
+    dead_hosts = None if args.no_website_scraping else dead_host_cache_from_args(args)
+    concurrency = None if args.no_website_scraping else concurrency_from_args(args)
     scraper = GMBScraperEnhanced(
         headless=not args.no_headless,
-        scrape_websites=not args.no_website_scraping
+        scrape_websites=not args.no_website_scraping,
+        http_cache=http_cache,
+        limiter=limiter,
+        dead_hosts=dead_hosts,
+        concurrency=concurrency
     )
     
     try:
@@ -665,6 +769,17 @@ Examples:
         
     finally:
         scraper.close()
+        if scraper.scrape_websites:
+            print(f"Website crawl: {scraper.email_extractor.summary()}")
+        if http_cache is not None:
+            print(f"HTTP cache: {http_cache.summary()}")
+            http_cache.close()
+        if limiter is not None:
+            print(f"Host rate limit: {limiter.summary()}")
+            limiter.close()
+        if dead_hosts is not None:
+            print(f"Dead hosts: {dead_hosts.summary()}")
+            dead_hosts.close()
 
 
 if __name__ == "__main__":
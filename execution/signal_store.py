@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Signal Store
+
+Keeps, per website (normalize_site key: domain plus path), the raw signals the pain-point rules and the
+opportunity score are computed from: the design issues, the automation gaps
+and the homepage load time. analyze_pain_points.py writes them as it goes;
+rescore_leads.py reads them back to re-apply changed thresholds to the whole
+lead base in milliseconds, with no crawl.
+
+Rows are small (two compact JSON arrays and a float), so the store of a
+20k-lead campaign is a few MB. The key column is still named domain; a
+site at the root of its domain has the same key as before.
+
+Usage:
+    from signal_store import SignalStore
+    from deduplicate_leads import normalize_site
+
+    store = SignalStore(Path(".tmp/signals.sqlite"))
+    store.put(normalize_site(url), design_issues, automation_gaps, load_time)
+    signals = store.load_all()    # site -> signals
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_SIGNALS_PATH = Path(__file__).parent.parent / ".tmp" / "signals.sqlite"
+
+
+def _pack(values: List[str]) -> str:
+    return json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+
+
+class SignalStore:
+    """SQLite-backed map of site -> (design issues, automation gaps, load time)"""
+
+    def __init__(self, path: Path = DEFAULT_SIGNALS_PATH):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.written = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS signals (
+                domain TEXT PRIMARY KEY,
+                design_issues TEXT NOT NULL,
+                automation_gaps TEXT NOT NULL,
+                load_time REAL NOT NULL,
+                partial INTEGER NOT NULL,
+                stored_at TEXT NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def put(self, site: str, design_issues: List[str], automation_gaps: List[str],
+            load_time: float, partial: bool = False):
+        """Store (or replace) the latest signals of site"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?)",
+                (site, _pack(design_issues), _pack(automation_gaps), load_time,
+                 int(partial), datetime.now().isoformat(timespec='seconds'))
+            )
+            self.conn.commit()
+            self.written += 1
+
+    def get(self, site: str) -> Optional[Dict]:
+        """Signals of site, or None if it was never analyzed"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT domain, design_issues, automation_gaps, load_time, partial FROM signals WHERE domain = ?",
+                (site,)
+            ).fetchone()
+        return self._unpack(row) if row else None
+
+    def load_all(self) -> Dict[str, Dict]:
+        """Every stored site's signals (one query; the whole store fits in memory)"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT domain, design_issues, automation_gaps, load_time, partial FROM signals"
+            ).fetchall()
+        return {row[0]: self._unpack(row) for row in rows}
+
+    @staticmethod
+    def _unpack(row: tuple) -> Dict:
+        return {
+            'design_issues': json.loads(row[1]),
+            'automation_gaps': json.loads(row[2]),
+            'load_time': row[3],
+            'partial': bool(row[4])
+        }
+
+    def close(self):
+        self.conn.close()
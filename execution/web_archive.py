@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Website Fetch Archive (WARC)
+
+Records every website response a run sees (homepage, subpages, robots.txt,
+sitemaps, headless renders) and every fetch failure into rotating WARC/1.0
+files, so the analysis can be replayed later with no network at all: after
+changing pain-point rules or owner regexes, 20k stored sites are re-analyzed
+at disk speed.
+
+Files are standard gzip-per-record WARC (readable by warcio, pywb...):
+
+- response    HTTP status line, headers and the decoded body
+- resource    rendered DOM of a JS page (WARC-Target-URI render:<url>)
+- metadata    a failed fetch (error class and message), so replay fails the
+              same way
+
+Extension fields: WARC-X-Requested-URI (URL asked for, before redirects),
+WARC-X-Elapsed (download seconds, so "Carga lenta" survives replay) and
+WARC-X-Timing (fetch_timing phases in ms). Next to the WARC files,
+index.jsonl maps every URL to (file, offset, length); replay only reads the
+record it needs.
+
+Usage:
+    archive = WarcArchive(Path(".tmp/archive/run_20250101_120000"))
+    archive.record(url, response, elapsed)       # while fetching
+    archive.close()
+
+    replay = ArchiveReplay(Path(".tmp/archive/run_20250101_120000"))
+    response = replay.get(url)                   # no network
+"""
+
+import argparse
+import gzip
+import io
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.client import responses as HTTP_REASONS
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from dead_hosts import DeadHostError
+from http_cache import SKIPPED_HEADERS
+
+# Default parent directory; each run writes to its own subdirectory
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent.parent / ".tmp" / "archive"
+
+INDEX_NAME = 'index.jsonl'
+
+# Exceptions a stored failure is raised as on replay (anything else: ConnectionError)
+REPLAYED_ERRORS = {
+    cls.__name__: cls for cls in [
+        requests.ConnectTimeout, requests.ReadTimeout, requests.Timeout,
+        requests.exceptions.SSLError, requests.ConnectionError, requests.TooManyRedirects,
+        DeadHostError,
+    ]
+}
+
+
+class NotArchivedError(requests.ConnectionError):
+    """Replay asked for a URL the archived run never fetched"""
+
+
+class WarcArchive:
+    """Thread-safe writer of rotating WARC files plus their index"""
+
+    def __init__(self, directory: Path, max_file_mb: float = 512):
+        """
+        Args:
+            directory: Run directory (created); files are archive-00000.warc.gz...
+            max_file_mb: Compressed size at which the next file is started
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = int(max_file_mb * 1024 * 1024)
+        self.records = 0
+        self.lock = threading.Lock()
+        self._file_number = -1
+        self._file = None
+        self._index = open(directory / INDEX_NAME, 'a', encoding='utf-8')
+        self._rotate()
+        self._write_record('warcinfo', None, 'application/warc-fields',
+                           b"software: analyze_pain_points.py\r\nformat: WARC File Format 1.0\r\n")
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._file_number += 1
+        self._file_name = f"archive-{self._file_number:05d}.warc.gz"
+        self._file = open(self.directory / self._file_name, 'ab')
+
+    def _write_record(self, warc_type: str, target_uri: Optional[str], content_type: str,
+                      block: bytes, extra: Optional[Dict[str, str]] = None) -> Dict:
+        """Append one gzip member; returns its index entry (lock held by caller or __init__)"""
+        headers = {
+            'WARC-Type': warc_type,
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>",
+            'WARC-Date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+        if target_uri:
+            headers['WARC-Target-URI'] = target_uri
+        headers.update(extra or {})
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(block))
+        head = 'WARC/1.0\r\n' + ''.join(f"{k}: {v}\r\n" for k, v in headers.items()) + '\r\n'
+
+        offset = self._file.tell()
+        self._file.write(gzip.compress(head.encode('utf-8') + block + b'\r\n\r\n', compresslevel=6))
+        entry = {'file': self._file_name, 'offset': offset, 'length': self._file.tell() - offset}
+        self.records += 1
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+        return entry
+
+    def _index_urls(self, entry: Dict, *urls: str):
+        for url in dict.fromkeys(u for u in urls if u):
+            self._index.write(json.dumps({'url': url, **entry}) + '\n')
+        self._index.flush()
+
+    def record(self, url: str, response: requests.Response, elapsed: Optional[float] = None):
+        """
+        Archive a response whose body has been read.
+
+        Args:
+            url: URL requested (redirects end at response.url)
+            response: The response
+            elapsed: Download seconds (default: response.elapsed)
+        """
+        if elapsed is None:
+            elapsed = response.elapsed.total_seconds()
+        reason = response.reason or HTTP_REASONS.get(response.status_code, '')
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS]
+        headers.append(('Content-Length', str(len(response.content))))
+        http_head = f"HTTP/1.1 {response.status_code} {reason}\r\n" + \
+                    ''.join(f"{k}: {v}\r\n" for k, v in headers) + '\r\n'
+        extra = {'WARC-X-Requested-URI': url, 'WARC-X-Elapsed': f"{elapsed:.3f}"}
+        if getattr(response, 'timing', None):
+            extra['WARC-X-Timing'] = json.dumps(response.timing, separators=(',', ':'))
+        with self.lock:
+            entry = self._write_record('response', response.url, 'application/http;msgtype=response',
+                                       http_head.encode('iso-8859-1', errors='replace') + response.content,
+                                       extra)
+            self._index_urls(entry, url, response.url)
+
+    def record_error(self, url: str, error: Exception):
+        """Archive a failed fetch so replay raises the same kind of error"""
+        message = ' '.join(str(error).split())[:500]
+        fields = f"error-class: {type(error).__name__}\r\nerror: {message}\r\n"
+        with self.lock:
+            entry = self._write_record('metadata', url, 'application/warc-fields', fields.encode('utf-8'))
+            self._index_urls(entry, url)
+
+    def record_render(self, url: str, html: str):
+        """Archive the headless-rendered DOM of url"""
+        with self.lock:
+            entry = self._write_record('resource', f"render:{url}", 'text/html; charset=utf-8',
+                                       html.encode('utf-8'))
+            self._index_urls(entry, f"render:{url}")
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+            self._index.close()
+
+
+def _read_record(path: Path, offset: int, length: int) -> tuple:
+    """(WARC headers, block) of the gzip member at offset"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    head, _, rest = data.partition(b'\r\n\r\n')
+    headers = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        key, _, value = line.partition(':')
+        headers[key.strip()] = value.strip()
+    return headers, rest[:int(headers.get('Content-Length', len(rest)))]
+
+
+class ArchiveReplay:
+    """Serves a run's archived responses in place of the network"""
+
+    def __init__(self, directory: Path):
+        """
+        Args:
+            directory: Run directory written by WarcArchive
+        """
+        self.directory = directory
+        self.served = 0
+        self.missing = 0
+        self.lock = threading.Lock()
+        # url -> index entry; a later record of the same URL (a retry) wins
+        self._index: Dict[str, Dict] = {}
+        with open(directory / INDEX_NAME, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._index[entry.pop('url')] = entry
+
+    def __len__(self) -> int:
+        return sum(1 for url in self._index if not url.startswith('render:'))
+
+    def get(self, url: str) -> requests.Response:
+        """
+        Archived response for url, or the archived failure raised again.
+
+        Raises:
+            NotArchivedError: url was not fetched in the archived run
+        """
+        entry = self._index.get(url)
+        if entry is None:
+            with self.lock:
+                self.missing += 1
+            raise NotArchivedError(f"No archivado: {url}")
+        headers, block = _read_record(self.directory / entry['file'], entry['offset'], entry['length'])
+        with self.lock:
+            self.served += 1
+
+        if headers['WARC-Type'] == 'metadata':
+            fields = dict(line.split(': ', 1) for line in block.decode('utf-8').splitlines() if ': ' in line)
+            raise REPLAYED_ERRORS.get(fields.get('error-class'), requests.ConnectionError)(fields.get('error', ''))
+
+        http_head, _, body = block.partition(b'\r\n\r\n')
+        lines = http_head.decode('iso-8859-1').split('\r\n')
+        response = requests.Response()
+        response.status_code = int(lines[0].split(' ', 2)[1])
+        response.reason = lines[0].split(' ', 2)[2] if lines[0].count(' ') >= 2 else ''
+        response.headers = CaseInsensitiveDict(
+            line.split(': ', 1) for line in lines[1:] if ': ' in line
+        )
+        response._content = body
+        response.url = headers['WARC-Target-URI']
+        response.elapsed = timedelta(seconds=float(headers.get('WARC-X-Elapsed', 0)))
+        response.raw = io.BytesIO(body)
+        if 'WARC-X-Timing' in headers:
+            response.timing = json.loads(headers['WARC-X-Timing'])
+        response.from_cache = True
+        return response
+
+    def render(self, url: str, timeout: float = 0) -> Optional[str]:
+        """Archived rendered DOM of url (same interface as RenderPool.render)"""
+        entry = self._index.get(f"render:{url}")
+        if entry is None:
+            return None
+        _, block = _read_record(self.directory / entry['file'], entry['offset'], entry['length'])
+        return block.decode('utf-8')
+
+    def summary(self) -> str:
+        return f"{self.served} respuestas servidas desde el archivo, {self.missing} no archivadas"
+
+
+def add_archive_arguments(parser: argparse.ArgumentParser):
+    """Add --archive and --archive-max-mb to a script's CLI"""
+    parser.add_argument(
+        '--archive',
+        nargs='?',
+        const='auto',
+        default=None,
+        metavar='DIR',
+        help='Write every fetched response to WARC files (default dir: .tmp/archive/run_<timestamp>)'
+    )
+    parser.add_argument(
+        '--archive-max-mb',
+        type=float,
+        default=512,
+        help='Size at which the archive starts a new WARC file (default: 512)'
+    )
+
+
+def archive_from_args(args: argparse.Namespace) -> Optional[WarcArchive]:
+    """WarcArchive for --archive (None if not requested)"""
+    if args.archive is None:
+        return None
+    if args.archive == 'auto':
+        directory = DEFAULT_ARCHIVE_DIR / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    else:
+        directory = Path(args.archive)
+    return WarcArchive(directory, max_file_mb=args.archive_max_mb)
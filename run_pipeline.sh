@@ -41,11 +41,20 @@ echo "🧹 STEP 2: Removing duplicates..."
 CLEAN_FILE=".tmp/leads_clean.json"
 python3 execution/deduplicate_leads.py --input "$LATEST_FILE" --output "$CLEAN_FILE"
 
+# 2b. Probe (Website liveness)
+echo ""
+echo "📶 STEP 2b: Probing websites (liveness, redirects, TLS)..."
+PROBED_FILE=".tmp/leads_probed.json"
+python3 execution/probe_websites.py --input "$CLEAN_FILE" --output "$PROBED_FILE"
+
 # 3. Analyze (Website)
 echo ""
 echo "🧠 STEP 3: Analyzing Websites (Internal & Pain Points)..."
 ANALYZED_FILE=".tmp/leads_analyzed.json"
-python3 execution/analyze_pain_points.py --input "$CLEAN_FILE" --output-format json
+# Full analysis: the exporters read the score and owner fields, which need
+# every detector and the owner subpages, so --fields would not
+# skip any work here. Use --fields pain_point for a quick pain-point-only pass
+python3 execution/analyze_pain_points.py --input "$PROBED_FILE" --output-format json
 
 # 3b. Enrich (External - LinkedIn/InfoCIF)
 echo ""
@@ -0,0 +1,29 @@
+"""Encoding sniffing of legacy Spanish pages (execution/charset_sniffing.py)"""
+
+import codecs
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "execution"))
+
+from charset_sniffing import ENCODING_ALIASES, sniff_encoding
+
+
+def test_meta_latin1_is_read_as_cp1252():
+    # \x80 (euro sign) and \x93/\x94 (curly quotes) only exist in cp1252
+    body = ('<html><head><meta charset="latin-1"></head>'
+            '<body>Año 2019 · “presupuesto” 20€</body></html>').encode('cp1252')
+
+    encoding, path = sniff_encoding(body, 'text/html')
+
+    assert (encoding, path) == ('cp1252', 'meta')
+    assert '“presupuesto” 20€' in body.decode(encoding)
+
+
+def test_header_latin1_labels_are_aliased():
+    for label in ('latin-1', 'ISO-8859-1', 'latin1'):
+        assert sniff_encoding(b'<p>caf\xe9</p>', f'text/html; charset={label}') == ('cp1252', 'header')
+
+
+def test_aliases_are_keyed_by_codec_name():
+    assert all(codecs.lookup(name).name == name for name in ENCODING_ALIASES)